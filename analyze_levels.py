@@ -0,0 +1,53 @@
+import gzip
+import json
+import multiprocessing as mp
+import sys
+import time
+from pathlib import Path
+
+from convexity.analytics import ChartStats, analyze_level_data
+from export import BASE_DIR, PROCESS_COUNT
+
+INDEX_PATH = BASE_DIR / "analytics.json"
+
+
+def analyze_level(level_dir: Path) -> tuple[str, ChartStats]:
+    data = json.loads(gzip.decompress((level_dir / "data").read_bytes()))
+    stats = analyze_level_data(data)
+
+    item_path = level_dir / "item.json"
+    item = json.loads(item_path.read_text(encoding="utf-8"))
+    item["meta"] = {**(item.get("meta") or {}), "analytics": stats._asdict()}
+    item_path.write_text(json.dumps(item, ensure_ascii=False), encoding="utf-8")
+    return level_dir.name, stats
+
+
+def analyze_levels(levels_dir: Path, process_count: int = PROCESS_COUNT) -> dict[str, ChartStats]:
+    level_dirs = sorted(path.parent for path in Path(levels_dir).glob("*/data"))
+    print(f"Analyzing {len(level_dirs)} levels using {process_count} processes...")
+
+    start = time.perf_counter()
+    with mp.Pool(process_count) as pool:
+        results = dict(pool.imap_unordered(analyze_level, level_dirs, chunksize=16))
+    print(f"Analyzed {len(results)} levels in {time.perf_counter() - start:.2f}s")
+    return results
+
+
+def write_index(results: dict[str, ChartStats], path: Path = INDEX_PATH):
+    index = {name: stats._asdict() for name, stats in sorted(results.items())}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+    print(f"Wrote index to {path}")
+
+
+def load_index(path: Path = INDEX_PATH) -> dict[str, ChartStats]:
+    return {name: ChartStats(**stats) for name, stats in json.loads(path.read_text(encoding="utf-8")).items()}
+
+
+def main():
+    levels_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else BASE_DIR / "levels"
+    write_index(analyze_levels(levels_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import argparse
+import gc
+import gzip
+import json
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from sonolus.build.level import package_level_data
+
+from convexity.convert.bestdori import convert_bestdori
+from convexity.convert.osu import convert_osu
+from convexity.convert.sonolus_bandori import convert_sonolus_bandori_level_data
+from convexity.convert.sonolus_llsif import convert_sonolus_llsif_level_data
+from convexity.convert.sonolus_nanaon import convert_sonolus_nanaon_level_data
+from convexity.convert.utils import decode_json_gzip
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def generate_bestdori(note_count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    data: list[dict] = [{"type": "BPM", "bpm": 120, "beat": 0}]
+    beat = 1.0
+    while len(data) < note_count:
+        beat += rng.choice((0.25, 0.5))
+        lane = rng.randrange(7)
+        match rng.randrange(4):
+            case 0:
+                data.append({"type": "Single", "beat": beat, "lane": lane})
+            case 1:
+                data.append({"type": "Single", "beat": beat, "lane": lane, "flick": True})
+            case 2:
+                data.append(
+                    {
+                        "type": "Directional",
+                        "beat": beat,
+                        "lane": lane,
+                        "direction": rng.choice(("Left", "Right")),
+                        "width": 1,
+                    }
+                )
+            case _:
+                data.append(
+                    {
+                        "type": "Slide",
+                        "connections": [
+                            {"beat": beat + i * 0.25, "lane": rng.randrange(7), "hidden": 0 < i < 3 and i % 2 == 1}
+                            for i in range(4)
+                        ],
+                    }
+                )
+    return data
+
+
+def sonolus_entity(archetype: str, name: str | None = None, **data: float | str) -> dict:
+    entity = {
+        "archetype": archetype,
+        "data": [
+            {"name": key, "ref": value} if isinstance(value, str) else {"name": key, "value": value}
+            for key, value in data.items()
+        ],
+    }
+    if name is not None:
+        entity["name"] = name
+    return entity
+
+
+def generate_sonolus_slides(note_count: int, lane_count: int, directional: bool, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    entities = [
+        sonolus_entity("Initialization"),
+        sonolus_entity("Stage"),
+        sonolus_entity("#BPM_CHANGE", **{"#BEAT": 0, "#BPM": 120}),
+    ]
+    beat = 1.0
+    note_total = 0
+    while note_total < note_count:
+        beat += rng.choice((0.25, 0.5))
+        lane = rng.randrange(lane_count) - (lane_count - 1) / 2
+        match rng.randrange(4):
+            case 0:
+                entities.append(sonolus_entity("TapNote", **{"#BEAT": beat, "lane": lane}))
+                note_total += 1
+            case 1:
+                entities.append(sonolus_entity("FlickNote", **{"#BEAT": beat, "lane": lane}))
+                note_total += 1
+            case 2 if directional:
+                entities.append(
+                    sonolus_entity(
+                        "DirectionalFlickNote",
+                        **{"#BEAT": beat, "lane": lane, "direction": rng.choice((-1, 1)), "size": 1},
+                    )
+                )
+                note_total += 1
+            case _:
+                names = [f"{len(entities) + i}" for i in range(3)]
+                archetypes = ("SlideStartNote", "SlideTickNote", "SlideEndNote")
+                for i, (name, archetype) in enumerate(zip(names, archetypes, strict=True)):
+                    entities.append(sonolus_entity(archetype, name, **{"#BEAT": beat + i * 0.25, "lane": lane}))
+                connector = "StraightSlideConnector" if directional else "SlideConnector"
+                entities.append(sonolus_entity(connector, head=names[0], tail=names[1]))
+                entities.append(sonolus_entity(connector, head=names[1], tail=names[2]))
+                note_total += 3
+        if rng.random() < 0.1:
+            entities.append(sonolus_entity("SimLine"))
+    return {"bgmOffset": 0, "entities": entities}
+
+
+def generate_sonolus_bandori(note_count: int, seed: int = 0) -> dict:
+    return generate_sonolus_slides(note_count, lane_count=7, directional=True, seed=seed)
+
+
+def generate_sonolus_nanaon(note_count: int, seed: int = 0) -> dict:
+    return generate_sonolus_slides(note_count, lane_count=5, directional=False, seed=seed)
+
+
+def generate_sonolus_llsif(note_count: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    entities = [sonolus_entity("#BPM_CHANGE", **{"#BEAT": 0, "#BPM": 150})]
+    beat = 1.0
+    note_total = 0
+    while note_total < note_count:
+        beat += rng.choice((0.25, 0.5))
+        lane = rng.randrange(9) - 4
+        match rng.randrange(3):
+            case 0:
+                entities.append(sonolus_entity("TapNote", **{"#BEAT": beat, "lane": lane}))
+                note_total += 1
+            case 1:
+                entities.append(
+                    sonolus_entity("SwingNote", **{"#BEAT": beat, "lane": lane, "direction": rng.choice((-1, 1))})
+                )
+                note_total += 1
+            case _:
+                entities.append(sonolus_entity("TapNote", **{"#BEAT": beat, "lane": lane, "hold": 1}))
+                entities.append(sonolus_entity("HoldNote", **{"#BEAT": beat + 0.5, "prev": len(entities) - 1}))
+                note_total += 2
+        if rng.random() < 0.05:
+            entities.append(sonolus_entity("TimescaleChange", **{"#BEAT": beat, "#TIMESCALE": rng.choice((0.5, 1, 2))}))
+    return {"bgmOffset": 0, "entities": entities}
+
+
+def generate_osu_mania(note_count: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lane_count = 7
+    lines = [
+        "osu file format v14",
+        "",
+        "[General]",
+        "AudioFilename: audio.mp3",
+        "Mode: 3",
+        "",
+        "[Metadata]",
+        "Title:Benchmark",
+        "TitleUnicode:Benchmark",
+        "Artist:Benchmark",
+        "ArtistUnicode:Benchmark",
+        "Creator:Benchmark",
+        "Version:Benchmark",
+        "BeatmapID:0",
+        "BeatmapSetID:0",
+        "",
+        "[Difficulty]",
+        f"CircleSize:{lane_count}",
+        "",
+        "[TimingPoints]",
+        "0,500,4,1,0,100,1,0",
+    ]
+    lines.extend(f"{i * 2000},{rng.choice((-50, -100, -200))},4,1,0,100,0,0" for i in range(1, note_count // 100 + 1))
+    lines.extend(("", "[HitObjects]"))
+    note_time = 1000
+    for _ in range(note_count):
+        note_time += rng.choice((0, 125, 250))
+        x = (rng.randrange(lane_count) * 512 + 256) // lane_count
+        if rng.random() < 0.25:
+            lines.append(f"{x},192,{note_time},128,0,{note_time + 500}:0:0:0:0:")
+        else:
+            lines.append(f"{x},192,{note_time},1,0,0:0:0:0:")
+    return "\n".join(lines)
+
+
+def measure(fn: Callable[[], Any], memory: bool) -> tuple[Any, float, int | None]:
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        del result
+        gc.collect()
+        tracemalloc.start()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmark_source(name: str, note_count: int, memory: bool) -> list[dict]:
+    results = []
+
+    def record(stage: str, fn: Callable[[], Any]) -> Any:
+        result, elapsed, peak = measure(fn, memory)
+        results.append(
+            {
+                "source": name,
+                "notes": note_count,
+                "stage": stage,
+                "seconds": elapsed,
+                "peak_bytes": peak,
+            }
+        )
+        print(f"{name:>15} {note_count:>9} {stage:>8}: {elapsed:8.3f}s" + (f" {peak / 2**20:9.1f} MiB" if peak else ""))
+        return result
+
+    match name:
+        case "bestdori":
+            data = generate_bestdori(note_count)
+            level_data = record("convert", lambda: convert_bestdori(data))
+        case "sonolus_bandori" | "sonolus_llsif" | "sonolus_nanaon":
+            generator, converter = {
+                "sonolus_bandori": (generate_sonolus_bandori, convert_sonolus_bandori_level_data),
+                "sonolus_llsif": (generate_sonolus_llsif, convert_sonolus_llsif_level_data),
+                "sonolus_nanaon": (generate_sonolus_nanaon, convert_sonolus_nanaon_level_data),
+            }[name]
+            # Sonolus servers send level data gzipped, which is decoded before it is converted.
+            raw = gzip.compress(json.dumps(generator(note_count)).encode("utf-8"))
+            data = record("parse", lambda: decode_json_gzip(raw))
+            level_data = record("convert", lambda: converter(data))
+        case "osu":
+            data = generate_osu_mania(note_count)
+            with tempfile.TemporaryDirectory() as temp_dir:
+                assets = Path(temp_dir)
+                (assets / "audio.mp3").write_bytes(b"")
+                level_data = record("convert", lambda: convert_osu(data, assets).data)
+        case _:
+            raise ValueError(f"Unknown source: {name}")
+    record("export", lambda: package_level_data(level_data))
+    return results
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old: dict, new: dict):
+    old_by_key = {(r["source"], r["notes"], r["stage"]): r for r in old["results"]}
+    print(f"Comparing {old.get('commit')} -> {new.get('commit')}")
+    for result in new["results"]:
+        key = (result["source"], result["notes"], result["stage"])
+        if key not in old_by_key:
+            continue
+        ratio = result["seconds"] / old_by_key[key]["seconds"] if old_by_key[key]["seconds"] else float("inf")
+        print(f"{key[0]:>15} {key[1]:>9} {key[2]:>8}: {ratio:6.2f}x time")
+
+
+def main():
+    sources = ["bestdori", "sonolus_bandori", "sonolus_llsif", "sonolus_nanaon", "osu"]
+    parser = argparse.ArgumentParser(description="Benchmark the level converters on synthetic charts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="note counts to benchmark")
+    parser.add_argument("--sources", nargs="+", choices=sources, default=sources)
+    parser.add_argument("--no-memory", action="store_true", help="skip peak memory measurement")
+    parser.add_argument("--output", type=Path, help="write results as json to this path")
+    parser.add_argument("--compare", type=Path, help="compare against a previous json result")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        for source in args.sources:
+            results.extend(benchmark_source(source, size, memory=not args.no_memory))
+
+    output = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(output, indent=2), encoding="utf-8")
+    if args.compare:
+        compare(json.loads(args.compare.read_text(encoding="utf-8")), output)
+
+
+if __name__ == "__main__":
+    main()
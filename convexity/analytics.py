@@ -0,0 +1,105 @@
+import bisect
+from typing import NamedTuple
+
+from convexity.common.note import NoteVariant
+from convexity.convert.timescale import make_beat_to_time
+from convexity.convert.utils import parse_entities
+
+FLICK_VARIANTS = frozenset({NoteVariant.FLICK, NoteVariant.DIRECTIONAL_FLICK})
+
+
+class ChartStats(NamedTuple):
+    """Statistics of a chart for filtering levels without reading their data.
+
+    Attributes:
+        note_count: The number of scored notes.
+        duration: The time in seconds from the first to the last note.
+        nps_mean: The average number of scored notes per second.
+        nps_peak: The largest number of scored notes within any window of ``window`` seconds, per second.
+        max_chord_width: The largest number of notes connected by sim lines.
+        hold_coverage: The fraction of the duration during which at least one hold is active.
+        flick_ratio: The fraction of scored notes that are flicks.
+        timescale_group_count: The number of timescale groups.
+        timescale_change_count: The number of timescale changes across all groups.
+    """
+
+    note_count: int
+    duration: float
+    nps_mean: float
+    nps_peak: float
+    max_chord_width: int
+    hold_coverage: float
+    flick_ratio: float
+    timescale_group_count: int
+    timescale_change_count: int
+
+
+def analyze_level_data(data: dict, window: float = 1.0) -> ChartStats:
+    """Compute the statistics of exported level data.
+
+    Fields missing from an entity are read as zero, so compacted level data is supported as well.
+    """
+    entities = parse_entities(data["entities"])
+    # A bpm left out of compacted data is zero, which the validator reports, so such changes are skipped here.
+    beat_to_time = make_beat_to_time(
+        [
+            (e.data.get("#BEAT", 0), e.data.get("#BPM", 0))
+            for e in entities
+            if e.archetype == "#BPM_CHANGE" and e.data.get("#BPM", 0) > 0
+        ]
+    )
+
+    note_indexes = [i for i, e in enumerate(entities) if e.archetype in {"Note", "UnscoredNote"}]
+    times = {i: beat_to_time(entities[i].data.get("beat", 0)) for i in note_indexes}
+    scored_times = sorted(times[i] for i in note_indexes if entities[i].archetype == "Note")
+    note_count = len(scored_times)
+    duration = scored_times[-1] - scored_times[0] if scored_times else 0
+
+    peak_count = 0
+    for start, time in enumerate(scored_times):
+        peak_count = max(peak_count, bisect.bisect_left(scored_times, time + window, lo=start) - start)
+
+    chord_roots = {i: i for i in note_indexes}
+
+    def find_root(i: int) -> int:
+        while chord_roots[i] != i:
+            chord_roots[i] = chord_roots[chord_roots[i]]
+            i = chord_roots[i]
+        return i
+
+    hold_intervals = []
+    flick_count = 0
+    for i in note_indexes:
+        note = entities[i].data
+        sim_index = int(note.get("sim_note_ref", 0))
+        if sim_index in chord_roots:
+            chord_roots[find_root(i)] = find_root(sim_index)
+        prev_index = int(note.get("prev_note_ref", 0))
+        if prev_index in times:
+            hold_intervals.append((times[prev_index], times[i]))
+        if entities[i].archetype == "Note" and note.get("variant", 0) in FLICK_VARIANTS:
+            flick_count += 1
+
+    chord_widths: dict[int, int] = {}
+    for i in note_indexes:
+        root = find_root(i)
+        chord_widths[root] = chord_widths.get(root, 0) + 1
+
+    covered = 0.0
+    covered_until = -1e8
+    for start, end in sorted(hold_intervals):
+        if end > covered_until:
+            covered += end - max(start, covered_until)
+            covered_until = end
+
+    return ChartStats(
+        note_count=note_count,
+        duration=duration,
+        nps_mean=note_count / duration if duration > 0 else 0,
+        nps_peak=peak_count / window,
+        max_chord_width=max(chord_widths.values(), default=0),
+        hold_coverage=min(covered / duration, 1) if duration > 0 else 0,
+        flick_ratio=flick_count / note_count if note_count else 0,
+        timescale_group_count=sum(e.archetype == "TimescaleGroup" for e in entities),
+        timescale_change_count=sum(e.archetype == "TimescaleChange" for e in entities),
+    )
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import sqlite3
+from collections.abc import Generator
+from contextlib import contextmanager
+from os import PathLike
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS levels (
+    name TEXT PRIMARY KEY,
+    title TEXT,
+    artists TEXT,
+    author TEXT,
+    rating REAL,
+    source TEXT,
+    version INTEGER,
+    item TEXT NOT NULL,
+    cover_hash TEXT,
+    bgm_hash TEXT,
+    preview_hash TEXT,
+    data_hash TEXT,
+    sync_version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS levels_source ON levels (source);
+CREATE INDEX IF NOT EXISTS levels_rating ON levels (rating);
+CREATE INDEX IF NOT EXISTS levels_data_hash ON levels (data_hash);
+CREATE INDEX IF NOT EXISTS levels_sync_version ON levels (sync_version);
+
+CREATE TABLE IF NOT EXISTS level_tags (
+    level_name TEXT NOT NULL REFERENCES levels (name) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (level_name, tag)
+);
+CREATE INDEX IF NOT EXISTS level_tags_tag ON level_tags (tag);
+
+CREATE TABLE IF NOT EXISTS playlists (
+    name TEXT PRIMARY KEY,
+    title TEXT,
+    subtitle TEXT,
+    author TEXT,
+    source TEXT,
+    version INTEGER,
+    item TEXT NOT NULL,
+    sync_version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS playlists_sync_version ON playlists (sync_version);
+
+CREATE TABLE IF NOT EXISTS playlist_levels (
+    playlist_name TEXT NOT NULL REFERENCES playlists (name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    level_name TEXT NOT NULL,
+    PRIMARY KEY (playlist_name, position)
+);
+CREATE INDEX IF NOT EXISTS playlist_levels_level_name ON playlist_levels (level_name);
+"""
+
+
+def open_catalog(path: PathLike) -> sqlite3.Connection:
+    """Open the catalog, creating it if needed.
+
+    The connection waits for locks held by other processes, so exports running in parallel can share the catalog.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Transactions are started explicitly by write_transaction.
+    db = sqlite3.connect(path, timeout=60, isolation_level=None)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA foreign_keys = ON")
+    db.executescript(SCHEMA)
+    return db
+
+
+@contextmanager
+def write_transaction(db: sqlite3.Connection) -> Generator[None]:
+    """Run statements in a transaction holding the write lock from the start.
+
+    Sync versions are read and written in the same transaction, so workers can't hand out the same one.
+    """
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
+
+
+def localized(text: dict | str | None) -> str | None:
+    if isinstance(text, dict):
+        return text.get("en", next(iter(text.values()), None))
+    return text
+
+
+def file_hash(path: Path) -> str | None:
+    if not path.exists():
+        return None
+    return hashlib.sha1(path.read_bytes(), usedforsecurity=False).hexdigest()
+
+
+def next_sync_version(db: sqlite3.Connection) -> int:
+    (levels_version,) = db.execute("SELECT coalesce(max(sync_version), 0) FROM levels").fetchone()
+    (playlists_version,) = db.execute("SELECT coalesce(max(sync_version), 0) FROM playlists").fetchone()
+    return max(levels_version, playlists_version) + 1
+
+
+def has_level(db: sqlite3.Connection, name: str) -> bool:
+    return db.execute("SELECT 1 FROM levels WHERE name = ?", (name,)).fetchone() is not None
+
+
+def upsert_level(db: sqlite3.Connection, level_dir: Path, source: str | None):
+    """Add or update a level in the catalog from its exported directory.
+
+    The sync version is only advanced if the item or any asset changed, so consumers can sync incrementally by
+    querying for sync versions above the last one they saw.
+    """
+    item_text = (level_dir / "item.json").read_text(encoding="utf-8")
+    item = json.loads(item_text)
+    row = (
+        localized(item.get("title")),
+        localized(item.get("artists")),
+        localized(item.get("author")),
+        item.get("rating"),
+        source,
+        item.get("version"),
+        item_text,
+        file_hash(level_dir / "cover"),
+        file_hash(level_dir / "bgm"),
+        file_hash(level_dir / "preview"),
+        file_hash(level_dir / "data"),
+    )
+    with write_transaction(db):
+        existing = db.execute(
+            "SELECT title, artists, author, rating, source, version, item, cover_hash, bgm_hash, preview_hash, "
+            "data_hash FROM levels WHERE name = ?",
+            (level_dir.name,),
+        ).fetchone()
+        if existing == row:
+            return
+        db.execute(
+            "INSERT INTO levels (name, title, artists, author, rating, source, version, item, cover_hash, bgm_hash, "
+            "preview_hash, data_hash, sync_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET title = excluded.title, artists = excluded.artists, "
+            "author = excluded.author, rating = excluded.rating, source = excluded.source, "
+            "version = excluded.version, item = excluded.item, cover_hash = excluded.cover_hash, "
+            "bgm_hash = excluded.bgm_hash, preview_hash = excluded.preview_hash, data_hash = excluded.data_hash, "
+            "sync_version = excluded.sync_version",
+            (level_dir.name, *row, next_sync_version(db)),
+        )
+        db.execute("DELETE FROM level_tags WHERE level_name = ?", (level_dir.name,))
+        db.executemany(
+            "INSERT OR IGNORE INTO level_tags (level_name, tag) VALUES (?, ?)",
+            [(level_dir.name, localized(tag.get("title"))) for tag in item.get("tags", [])],
+        )
+
+
+def upsert_playlist(db: sqlite3.Connection, playlist_dir: Path, source: str | None):
+    """Add or update a playlist in the catalog from its exported directory."""
+    item_text = (playlist_dir / "item.json").read_text(encoding="utf-8")
+    item = json.loads(item_text)
+    row = (
+        localized(item.get("title")),
+        localized(item.get("subtitle")),
+        localized(item.get("author")),
+        source,
+        item.get("version"),
+        item_text,
+    )
+    with write_transaction(db):
+        existing = db.execute(
+            "SELECT title, subtitle, author, source, version, item FROM playlists WHERE name = ?",
+            (playlist_dir.name,),
+        ).fetchone()
+        if existing == row:
+            return
+        db.execute(
+            "INSERT INTO playlists (name, title, subtitle, author, source, version, item, sync_version) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET title = excluded.title, subtitle = excluded.subtitle, "
+            "author = excluded.author, "
+            "source = excluded.source, version = excluded.version, item = excluded.item, "
+            "sync_version = excluded.sync_version",
+            (playlist_dir.name, *row, next_sync_version(db)),
+        )
+        db.execute("DELETE FROM playlist_levels WHERE playlist_name = ?", (playlist_dir.name,))
+        db.executemany(
+            "INSERT INTO playlist_levels (playlist_name, position, level_name) VALUES (?, ?, ?)",
+            [(playlist_dir.name, i, level) for i, level in enumerate(item.get("levels", []))],
+        )
+
+
+def changed_levels(db: sqlite3.Connection, since: int = 0) -> list[tuple[str, int]]:
+    """Get the names and sync versions of levels changed after a sync version, oldest change first."""
+    return db.execute(
+        "SELECT name, sync_version FROM levels WHERE sync_version > ? ORDER BY sync_version", (since,)
+    ).fetchall()
+
+
+def levels_with_tag(db: sqlite3.Connection, tag: str) -> list[str]:
+    return [
+        name for (name,) in db.execute("SELECT level_name FROM level_tags WHERE tag = ? ORDER BY level_name", (tag,))
+    ]
+
+
+def playlists_with_level(db: sqlite3.Connection, level_name: str) -> list[str]:
+    return [
+        name
+        for (name,) in db.execute(
+            "SELECT DISTINCT playlist_name FROM playlist_levels WHERE level_name = ? ORDER BY playlist_name",
+            (level_name,),
+        )
+    ]
@@ -320,21 +320,6 @@ def note_particle_circular_layout(pos: LanePosition) -> Quad:
     return result
 
 
-def connector_layout(
-    pos: LanePosition,
-    y: float,
-    prev_pos: LanePosition,
-    prev_y: float,
-) -> Quad:
-    base = Quad(
-        bl=Vec2(prev_pos.left, prev_y),
-        br=Vec2(prev_pos.right, prev_y),
-        tl=Vec2(pos.left, y),
-        tr=Vec2(pos.right, y),
-    )
-    return transform_quad(base)
-
-
 def sim_line_layout(
     pos: LanePosition,
     y: float,
@@ -382,6 +367,12 @@ def lane_hitbox(pos: LanePosition) -> Quad:
 
 
 def preempt_time() -> float:
+    if is_preprocessing():
+        return compute_preempt_time()
+    return FrameConstants.preempt_time
+
+
+def compute_preempt_time() -> float:
     base = 5 / Options.note_speed * (1.05 if Options.extend_lanes else 1)
     match Options.scroll_mode:
         case ScrollMode.CHAOS:
@@ -402,6 +393,58 @@ class LayoutMemory:
     backspin_reserve: float
 
 
+@level_memory
+class FrameConstants:
+    # Values shared by every note in a frame, updated once per frame by the init entity.
+    preempt_time: float
+    backspin_scale: float
+    blink_alpha: float
+    arc_quality: float
+    quality: float
+
+
+@level_memory
+class QualityGovernor:
+    average_delta_time: float
+    baseline_delta_time: float
+    quality: float
+    last_change_time: float
+
+
+def update_quality_governor() -> float:
+    window = 0.5
+    baseline_window = 10
+    min_quality = 0.2
+    step = 0.8
+    if QualityGovernor.quality == 0 or is_skip():
+        QualityGovernor.average_delta_time = 0
+        QualityGovernor.quality = 1
+        QualityGovernor.last_change_time = time()
+    if delta_time() <= 0:
+        # Paused frames say nothing about how long rendering takes.
+        return QualityGovernor.quality
+    if QualityGovernor.average_delta_time == 0:
+        QualityGovernor.average_delta_time = delta_time()
+        QualityGovernor.baseline_delta_time = delta_time()
+    average = QualityGovernor.average_delta_time
+    average += (delta_time() - average) * min(1.0, delta_time() / window)
+    # Frame times are compared to a baseline, since the refresh rate of the device isn't known. The baseline follows
+    # the average down at once and drifts back up slowly, so a fast stretch can't hold quality down for the rest of
+    # the level. Quality drops quickly while frames are slow and only recovers after frames have been fast for a while.
+    baseline = QualityGovernor.baseline_delta_time
+    baseline = min(average, baseline + (average - baseline) * min(1.0, delta_time() / baseline_window))
+    QualityGovernor.average_delta_time = average
+    QualityGovernor.baseline_delta_time = baseline
+    since_change = time() - QualityGovernor.last_change_time
+    if average > baseline * 1.3 and since_change > window:
+        QualityGovernor.quality = max(min_quality, QualityGovernor.quality * step)
+        QualityGovernor.last_change_time = time()
+    elif average < baseline * 1.1 and since_change > 4 * window:
+        QualityGovernor.quality = min(1.0, QualityGovernor.quality / step)
+        QualityGovernor.last_change_time = time()
+    return QualityGovernor.quality
+
+
 def update_backspin():
     drain_rate = 15
     apply_rate = 15
@@ -419,6 +462,10 @@ def update_backspin():
     LayoutMemory.backspin_reserve = backspin_reserve
 
 
+def backspin_scale() -> float:
+    return 1 + min(1.0, LayoutMemory.backspin_level) * Options.note_speed * 0.2 / 10
+
+
 def add_backspin():
     LayoutMemory.backspin_reserve += 1
 
@@ -429,7 +476,7 @@ def note_y(scaled_time: float, target_scaled_time: float) -> float:
         target_scaled_time,
         scaled_time,
     )
-    progress = 1 - (1 - progress) * (1 + min(1.0, LayoutMemory.backspin_level) * Options.note_speed * 0.2 / 10)
+    progress = 1 - (1 - progress) * FrameConstants.backspin_scale
     if Layout.approach_distance:
         approach_y = (
             lerp(
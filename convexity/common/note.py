@@ -26,11 +26,13 @@ from convexity.common.buckets import Buckets, note_judgment_window, tick_judgmen
 from convexity.common.effect import SFX_DISTANCE, Effects
 from convexity.common.layout import (
     EPSILON,
+    FrameConstants,
     LanePosition,
     Layer,
     Layout,
+    backspin_scale,
     clamp_y_to_stage,
-    connector_layout,
+    compute_preempt_time,
     lane_layout,
     note_layout,
     note_particle_circular_layout,
@@ -39,11 +41,19 @@ from convexity.common.layout import (
     sim_line_layout,
     transform_quad,
     transform_vec,
+    update_quality_governor,
 )
 from convexity.common.options import Options
 from convexity.common.particle import Particles
 from convexity.common.skin import Skin
 
+# Number of previous notes looked at to find the one a hold connector starts from.
+MAX_PREV_LOOKBACK = 20
+# Screen space distance a connector edge may bend away from its drawn segments at a connector quality of 1.
+CONNECTOR_TOLERANCE = 0.02
+CONNECTOR_ALPHA_TOLERANCE = 0.05
+MAX_CONNECTOR_DEPTH = 6
+
 
 class NoteVariant(IntEnum):
     SINGLE = 0
@@ -208,13 +218,17 @@ def y_to_alpha(y: float):
     else:
         result = 1
     if Options.blink:
-        beat = current_beat()
-        factor = 2 ** floor(log(240 / beat_to_bpm(beat) / log(2)))
-        blink_progress = 1 - abs(beat * factor - round(beat * factor)) * 2
-        result *= ease_in_out_sine(remap(0.4, 0.8, 0, 1, blink_progress))
+        result *= FrameConstants.blink_alpha
     return result
 
 
+def blink_alpha() -> float:
+    beat = current_beat()
+    factor = 2 ** floor(log(240 / beat_to_bpm(beat) / log(2)))
+    blink_progress = 1 - abs(beat * factor - round(beat * factor)) * 2
+    return ease_in_out_sine(remap(0.4, 0.8, 0, 1, blink_progress))
+
+
 def draw_note_body(
     sprite: Sprite,
     pos: LanePosition,
@@ -305,28 +319,60 @@ def _draw_note_connector(
         unlerp(prev_y, y, clamped_y),
     ).scale_centered(Options.note_size)
 
-    arc_quality = Options.arc_quality
-    n_segments = (
-        floor(abs(clamped_pos.mid - clamped_prev_pos.mid) * arc_quality * Options.arc)
-        + floor(abs(clamped_y - clamped_prev_y) * arc_quality)
-        + 1
-    )
-    for i in range(n_segments):
-        segment_pos = lerp(clamped_prev_pos, clamped_pos, (i + 1) / n_segments)
-        segment_y = lerp(clamped_prev_y, clamped_y, (i + 1) / n_segments)
-        segment_prev_pos = lerp(clamped_prev_pos, clamped_pos, i / n_segments)
-        segment_prev_y = lerp(clamped_prev_y, clamped_y, i / n_segments)
-        layout = connector_layout(
-            pos=segment_pos,
-            y=segment_y,
-            prev_pos=segment_prev_pos,
-            prev_y=segment_prev_y,
-        )
+    # Subdivides depth first while the screen space edges of a segment bend away from straight lines or its alpha
+    # changes too much to be drawn flat, with the current segment being the index-th of 2 ** depth.
+    tolerance = CONNECTOR_TOLERANCE / FrameConstants.arc_quality
+    z = Layer.CONNECTOR - y + pos.mid / 1000
+    start_left = transform_vec(Vec2(clamped_prev_pos.left, clamped_prev_y))
+    start_right = transform_vec(Vec2(clamped_prev_pos.right, clamped_prev_y))
+    start_alpha = y_to_alpha(clamped_prev_y)
+    depth = 0
+    index = 0
+    size = 1.0
+    while True:
+        start = index * size
+        end = start + size
+        end_pos = lerp(clamped_prev_pos, clamped_pos, end)
+        end_y = lerp(clamped_prev_y, clamped_y, end)
+        mid_pos = lerp(clamped_prev_pos, clamped_pos, (start + end) / 2)
+        mid_y = lerp(clamped_prev_y, clamped_y, (start + end) / 2)
+        end_left = transform_vec(Vec2(end_pos.left, end_y))
+        end_right = transform_vec(Vec2(end_pos.right, end_y))
+        end_alpha = y_to_alpha(end_y)
+        mid_alpha = y_to_alpha(mid_y)
+        if depth < MAX_CONNECTOR_DEPTH and (
+            chord_deviation(start_left, end_left, transform_vec(Vec2(mid_pos.left, mid_y))) > tolerance
+            or chord_deviation(start_right, end_right, transform_vec(Vec2(mid_pos.right, mid_y))) > tolerance
+            or max(abs(start_alpha - mid_alpha), abs(mid_alpha - end_alpha)) > CONNECTOR_ALPHA_TOLERANCE
+        ):
+            depth += 1
+            index *= 2
+            size /= 2
+            continue
         sprite.draw(
-            layout,
-            z=Layer.CONNECTOR - y + pos.mid / 1000,
-            a=Options.connector_alpha * y_to_alpha((segment_y + segment_prev_y) / 2),
+            Quad(bl=start_left, br=start_right, tl=end_left, tr=end_right),
+            z=z,
+            a=Options.connector_alpha * mid_alpha,
         )
+        start_left @= end_left
+        start_right @= end_right
+        start_alpha = end_alpha
+        index += 1
+        while index % 2 == 0 and depth > 0:
+            depth -= 1
+            index //= 2
+            size *= 2
+        if depth == 0:
+            break
+
+
+def chord_deviation(a: Vec2, b: Vec2, point: Vec2) -> float:
+    """Get the distance of a point from the line through a and b."""
+    chord = b - a
+    length = chord.magnitude
+    if length < EPSILON:
+        return (point - a).magnitude
+    return abs(chord.orthogonal().dot(point - a)) / length
 
 
 def _draw_horizontal_note_connector(
@@ -348,7 +394,7 @@ def _draw_horizontal_note_connector(
     bl = Vec2(pos.left, prev_y)
     br = Vec2(pos.right, prev_y)
 
-    arc_quality = Options.arc_quality
+    arc_quality = FrameConstants.arc_quality
     n_segments = floor(abs(pos.left - pos.right) * arc_quality * Options.arc) + 1
     for i in range(n_segments):
         segment_tl = lerp(tl, tr, i / n_segments)
@@ -395,7 +441,7 @@ def draw_note_sim_line(
         unlerp(y, sim_y, clamped_y) if abs(sim_y - y) > EPSILON else 0,
     ).scale_centered(Options.note_size)
 
-    arc_quality = Options.arc_quality
+    arc_quality = FrameConstants.arc_quality
     n_segments = (
         floor(abs(clamped_pos.mid - clamped_sim_pos.mid) * arc_quality * Options.arc)
         + floor(abs(clamped_y - clamped_sim_y) * arc_quality)
@@ -629,12 +675,12 @@ def play_hit_particle(
             note_particle_linear_layout(pos),
             duration=0.5,
         )
-    if Options.note_effect_circular_enabled:
+    if Options.note_effect_circular_enabled and FrameConstants.quality > 0.5:
         note_particle_circular.spawn(
             note_particle_circular_layout(pos),
             duration=0.5,
         )
-    if Options.lane_effect_enabled:
+    if Options.lane_effect_enabled and FrameConstants.quality > 0.3:
         Particles.lane.spawn(
             lane_layout(pos),
             duration=0.2,
@@ -742,7 +788,70 @@ def current_beat() -> float:
     return ScaledTimeState.beat
 
 
-def update_current_beat() -> float:
+def update_frame_constants():
+    FrameConstants.preempt_time = compute_preempt_time()
+    FrameConstants.backspin_scale = backspin_scale()
+    if Options.blink:
+        FrameConstants.blink_alpha = blink_alpha()
+    FrameConstants.quality = update_quality_governor() if Options.adaptive_quality else 1
+    FrameConstants.arc_quality = Options.arc_quality * FrameConstants.quality
+
+
+@level_memory
+class BeatTable:
+    # Bpm changes are looked up by binary search if they are contiguous entities sorted by beat.
+    start_index: int
+    end_index: int
+    is_sorted: bool
+    last_beat: float
+    cursor: int
+
+
+def add_bpm_change(index: int, beat: float):
+    if BeatTable.end_index == 0:
+        BeatTable.start_index = index
+        BeatTable.end_index = index + 1
+        BeatTable.is_sorted = True
+        BeatTable.cursor = index
+    elif index == BeatTable.end_index and beat >= BeatTable.last_beat:
+        BeatTable.end_index = index + 1
+    else:
+        BeatTable.is_sorted = False
+    BeatTable.last_beat = beat
+
+
+def update_current_beat(bpm_change_archetype) -> float:
+    if not BeatTable.is_sorted:
+        return solve_current_beat()
+
+    def end_time(i: int) -> float:
+        if i + 1 >= BeatTable.end_index:
+            return 1e8
+        return bpm_change_archetype.at(i + 1).time
+
+    i = BeatTable.cursor
+    if not (bpm_change_archetype.at(i).time <= time() < end_time(i)):
+        if end_time(i) <= time() < end_time(i + 1):
+            i += 1
+        else:
+            # Seeking, so find the last bpm change at or before the time.
+            lo = BeatTable.start_index
+            hi = BeatTable.end_index - 1
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if bpm_change_archetype.at(mid).time <= time():
+                    lo = mid
+                else:
+                    hi = mid - 1
+            i = lo
+    BeatTable.cursor = i
+    bpm_change = bpm_change_archetype.at(i)
+    beat = bpm_change.beat + (time() - bpm_change.time) * bpm_change.bpm / 60
+    ScaledTimeState.beat = beat
+    return beat
+
+
+def solve_current_beat() -> float:
     if is_skip():
         ScaledTimeState.beat = 0
     if time() <= 0:
@@ -254,6 +254,12 @@ class Options:
         step=1,
         unit=None,
     )
+    adaptive_quality: bool = toggle_option(
+        name="Adaptive Quality",
+        description="Lower connector, sim line and particle detail while frames take too long.",
+        scope="convexity",
+        default=False,
+    )
     lane_effect_enabled: bool = toggle_option(
         name=StandardText.LANE_EFFECT,
         scope="convexity",
@@ -0,0 +1,66 @@
+import bisect
+import logging
+
+from convexity.common.note import NoteVariant
+from convexity.convert.utils import linked_entity
+from convexity.play.note import Note
+
+logger = logging.getLogger(__name__)
+
+
+def remove_collinear_anchors(notes: list[Note], boundary_beats: list[float], tolerance: float = 0.01) -> list[Note]:
+    """Remove hold anchors lying on the straight connector between their neighbours.
+
+    An anchor is removed when it and every anchor already removed since the last kept note are within
+    ``tolerance`` lanes of the line from that note to the anchor's next note. Connectors are only straight in
+    time between changes of bpm or timescale, so anchors are kept if such a change lies between the two notes.
+
+    Args:
+        notes: The notes of the level, with prev notes linked.
+        boundary_beats: The beats of every bpm change and timescale change.
+        tolerance: The maximum lane distance of a removed anchor from the connector.
+
+    Returns:
+        The notes that are kept, with prev notes rewired to skip removed anchors.
+    """
+    boundary_beats = sorted(boundary_beats)
+    next_notes: dict[int, list[Note]] = {}
+    for note in notes:
+        prev = linked_entity(note.prev_note_ref)
+        if prev is not None:
+            next_notes.setdefault(id(prev), []).append(note)
+
+    def is_removable(kept: Note, skipped: list[Note], end: Note) -> bool:
+        if end.beat <= kept.beat:
+            return False
+        if bisect.bisect_right(boundary_beats, kept.beat) != bisect.bisect_left(boundary_beats, end.beat):
+            return False
+        slope = (end.lane - kept.lane) / (end.beat - kept.beat)
+        return all(abs(kept.lane + (n.beat - kept.beat) * slope - n.lane) <= tolerance for n in skipped)
+
+    removed: set[int] = set()
+    for head in notes:
+        if linked_entity(head.prev_note_ref) is not None:
+            continue
+        kept = head
+        skipped: list[Note] = []
+        note = head
+        while len(next_notes.get(id(note), ())) == 1:
+            note = next_notes[id(note)][0]
+            following = next_notes.get(id(note), [])
+            if (
+                note.variant == NoteVariant.HOLD_ANCHOR
+                and len(following) == 1
+                and is_removable(kept, [*skipped, note], following[0])
+            ):
+                skipped.append(note)
+                continue
+            if skipped:
+                removed.update(id(n) for n in skipped)
+                note.prev_note_ref @= kept.ref()
+            kept = note
+            skipped = []
+
+    if removed:
+        logger.info("Removed collinear hold anchors: %d", len(removed))
+    return [note for note in notes if id(note) not in removed]
@@ -3,6 +3,9 @@ import itertools
 from sonolus.script.level import Level, LevelData
 
 from convexity.common.note import NoteVariant
+from convexity.convert.anchors import remove_collinear_anchors
+from convexity.convert.order import order_notes
+from convexity.convert.timescale import bake_timescale_sections
 from convexity.convert.utils import get_bytes, get_json
 from convexity.play.bpm import BpmChange
 from convexity.play.init import Init
@@ -123,6 +126,9 @@ def convert_bestdori(data: list[dict]) -> LevelData:
                     )
                 )
 
+    # The runtime looks up the current beat by binary searching bpm changes in entity order.
+    bpm_changes.sort(key=lambda c: c.beat)
+    notes = remove_collinear_anchors(notes, [c.beat for c in bpm_changes] + [c.beat for c in timescale_changes])
     notes_by_beat: dict[float, list[Note]] = {}
     for note in notes:
         notes_by_beat.setdefault(note.beat, []).append(note)
@@ -131,9 +137,9 @@ def convert_bestdori(data: list[dict]) -> LevelData:
         for a, b in itertools.pairwise(n for n in group if n.variant != NoteVariant.HOLD_ANCHOR):
             a.sim_note_ref @= b.ref()
 
-    notes.sort(key=lambda note: note.beat)
+    notes = order_notes(notes)
 
-    return LevelData(
+    level_data = LevelData(
         bgm_offset=0,
         entities=[
             Init(
@@ -147,3 +153,4 @@ def convert_bestdori(data: list[dict]) -> LevelData:
             *notes,
         ],
     )
+    return bake_timescale_sections(level_data)
@@ -0,0 +1,134 @@
+import gzip
+import hashlib
+import json
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+from typing import Any
+
+from sonolus.build.level import build_level_data
+from sonolus.script.level import Level, LevelData
+from sonolus.script.metadata import Tag
+
+CACHE_DIR = Path(".cache") / "levels"
+
+# Bump when converters produce different level data for the same source.
+CONVERTER_VERSION = 3
+# Bump when the imported fields of the engine's archetypes change.
+SCHEMA_VERSION = 2
+
+
+@dataclass(eq=False)
+class CachedEntity:
+    """A level data entity restored from json.
+
+    It only supports what level data packaging needs, so levels can be exported without creating archetypes.
+    Entities compare by identity like archetypes do, since packaging uses them as dict keys.
+    """
+
+    name: str
+    entries: list[dict]
+
+    def _level_data_entries(self, level_refs: dict[Any, str] | None = None) -> list[dict]:
+        return [
+            {"name": entry["name"], "ref": level_refs[entry["ref"]]} if "ref" in entry else entry
+            for entry in self.entries
+        ]
+
+
+def level_data_from_json(data: dict) -> LevelData:
+    """Restore level data from its json, with references pointing to the restored entities."""
+    entities = [CachedEntity(e["archetype"], e["data"]) for e in data["entities"]]
+    entities_by_name = {e["name"]: entity for e, entity in zip(data["entities"], entities, strict=True) if "name" in e}
+    for entity in entities:
+        entity.entries = [
+            {"name": entry["name"], "ref": entities_by_name[entry["ref"]]} if "ref" in entry else entry
+            for entry in entity.entries
+        ]
+    return LevelData(bgm_offset=data["bgmOffset"], entities=entities)
+
+
+def hash_source(source: bytes | str) -> str:
+    return hashlib.sha256(source.encode("utf-8") if isinstance(source, str) else source).hexdigest()
+
+
+def cached_levels(source: bytes | str, convert: Callable[[], Iterable[Level]]) -> list[Level]:
+    """Get the levels converted from a source, converting them only if they aren't cached yet.
+
+    Args:
+        source: The source the levels are converted from, or a string identifying it.
+        convert: A function converting the source into levels.
+
+    Returns:
+        The converted levels.
+    """
+    cache_dir = CACHE_DIR / f"{hash_source(source)}-{CONVERTER_VERSION}-{SCHEMA_VERSION}"
+    manifest_path = cache_dir / "levels.json"
+    if manifest_path.exists():
+        return [load_cached_level(cache_dir, entry) for entry in json.loads(manifest_path.read_text(encoding="utf-8"))]
+
+    levels = list(convert())
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    manifest = [write_cached_level(cache_dir, i, level) for i, level in enumerate(levels)]
+    # The manifest is written last so an interrupted write is never read as a complete entry.
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    return levels
+
+
+def write_cached_level(cache_dir: Path, index: int, level: Level) -> dict:
+    data_path = cache_dir / f"{index}.data"
+    data_path.write_bytes(gzip.compress(json.dumps(build_level_data(level.data)).encode("utf-8")))
+    return {
+        "name": level.name,
+        "title": level.title,
+        "rating": level.rating,
+        "artists": level.artists,
+        "author": level.author,
+        "description": level.description,
+        "tags": [tag.as_dict() for tag in level.tags],
+        "meta": level.meta,
+        "cover": write_cached_asset(cache_dir / f"{index}.cover", level.cover),
+        "bgm": write_cached_asset(cache_dir / f"{index}.bgm", level.bgm),
+        "preview": write_cached_asset(cache_dir / f"{index}.preview", level.preview),
+        "data": data_path.name,
+    }
+
+
+def write_cached_asset(path: Path, asset: bytes | str | PathLike | None) -> dict | None:
+    match asset:
+        case None:
+            return None
+        case str():
+            return {"url": asset}
+        case bytes():
+            path.write_bytes(asset)
+        case _:
+            path.write_bytes(Path(asset).read_bytes())
+    return {"path": path.name}
+
+
+def load_cached_level(cache_dir: Path, entry: dict) -> Level:
+    data = json.loads(gzip.decompress((cache_dir / entry["data"]).read_bytes()))
+    return Level(
+        name=entry["name"],
+        title=entry["title"],
+        rating=entry["rating"],
+        artists=entry["artists"],
+        author=entry["author"],
+        description=entry["description"],
+        tags=[Tag(title=tag["title"], icon=tag.get("icon")) for tag in entry["tags"]],
+        meta=entry["meta"],
+        cover=load_cached_asset(cache_dir, entry["cover"]),
+        bgm=load_cached_asset(cache_dir, entry["bgm"]),
+        preview=load_cached_asset(cache_dir, entry["preview"]),
+        data=level_data_from_json(data),
+    )
+
+
+def load_cached_asset(cache_dir: Path, asset: dict | None) -> Path | str | None:
+    if asset is None:
+        return None
+    if "url" in asset:
+        return asset["url"]
+    return cache_dir / asset["path"]
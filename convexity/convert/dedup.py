@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from sonolus.build.level import build_level_data
+from sonolus.script.level import LevelData
+
+NOTE_ARCHETYPES = frozenset({"Note", "UnscoredNote"})
+TIMING_ARCHETYPES = frozenset({"#BPM_CHANGE", "TimescaleGroup", "TimescaleChange"})
+
+
+def chart_fingerprint(level_data: LevelData) -> str:
+    """Hash the chart of a level: its notes, bpm changes, timescale changes and bgm offset.
+
+    Every field of these entities is included. Notes are hashed in sorted order, with references replaced by the
+    fields of the entity they point to, so the entity order and generated names of a converter don't matter.
+    """
+    data = build_level_data(level_data)
+    entities = data["entities"]
+    indexes = {entity["name"]: i for i, entity in enumerate(entities) if "name" in entity}
+    values = [
+        sorted((entry["name"], entry["value"]) for entry in entity["data"] if "value" in entry) for entity in entities
+    ]
+    refs = [{entry["name"]: indexes[entry["ref"]] for entry in entity["data"] if "ref" in entry} for entity in entities]
+
+    # Timescale changes belong to the group they follow.
+    groups = {}
+    for i, entity in enumerate(entities):
+        if entity["archetype"] == "TimescaleGroup":
+            end = i + 1
+            while end < len(entities) and entities[end]["archetype"] == "TimescaleChange":
+                end += 1
+            groups[i] = [values[i], values[i + 1 : end]]
+
+    notes = sorted(
+        [
+            entity["archetype"],
+            values[i],
+            sorted(
+                [field, groups.get(target, []) if field == "timescale_group_ref" else values[target]]
+                for field, target in refs[i].items()
+            ),
+        ]
+        for i, entity in enumerate(entities)
+        if entity["archetype"] in NOTE_ARCHETYPES
+    )
+    bpm_changes = sorted(values[i] for i, entity in enumerate(entities) if entity["archetype"] == "#BPM_CHANGE")
+    canonical = [data["bgmOffset"], bpm_changes, sorted(groups.values()), notes]
+    return hashlib.sha256(json.dumps(canonical, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def config_fingerprint(level_data: LevelData) -> str:
+    """Hash the entities of a level that aren't part of its chart, such as the initialization, stage and lanes."""
+    data = build_level_data(level_data)
+    canonical = [
+        [entity["archetype"], [[entry["name"], entry.get("value")] for entry in entity["data"]]]
+        for entity in data["entities"]
+        if entity["archetype"] not in NOTE_ARCHETYPES | TIMING_ARCHETYPES
+    ]
+    return hashlib.sha256(json.dumps(canonical, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def claim(index_dir: Path, key: str, name: str) -> str:
+    """Claim a key for a level, returning the name of the level that claimed it first.
+
+    Claims are files created exclusively, so concurrent exports agree on a single owner.
+    """
+    path = index_dir / key
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with path.open("x", encoding="utf-8") as f:
+            f.write(name)
+    except FileExistsError:
+        # The owner may not have written its name yet, in which case the level keeps its own copy.
+        return path.read_text(encoding="utf-8") or name
+    return name
+
+
+def link_level_data(level_dir: Path, canonical_dir: Path) -> bool:
+    """Replace the data of a level with a hard link to the identical data of another level."""
+    canonical_data = canonical_dir / "data"
+    if not canonical_data.exists():
+        return False
+    data_path = level_dir / "data"
+    temp_path = level_dir / "data.link"
+    temp_path.unlink(missing_ok=True)
+    os.link(canonical_data, temp_path)
+    temp_path.replace(data_path)
+    return True
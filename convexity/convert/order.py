@@ -0,0 +1,85 @@
+import logging
+from typing import NamedTuple
+
+from sonolus.script.level import LevelData
+
+from convexity.convert.utils import linked_entity
+from convexity.play.note import Note
+from convexity.play.timescale import TimescaleChange, TimescaleGroup
+
+logger = logging.getLogger(__name__)
+
+
+def order_notes(notes: list[Note]) -> list[Note]:
+    """Sort notes into the order the runtime preprocesses them fastest in.
+
+    Ascending beats keep the target times seen by each timescale group increasing, so its search cursors never
+    reset. Notes sharing a beat are placed after the note they link back to.
+
+    Raises:
+        ValueError: If the prev notes of a note link back to it.
+    """
+    # Depth of every note in its prev chain, or -1 while the chain through it is being walked.
+    chain_depths: dict[int, int] = {}
+    for note in notes:
+        chain = []
+        current = note
+        while current is not None and id(current) not in chain_depths:
+            chain_depths[id(current)] = -1
+            chain.append(current)
+            current = linked_entity(current.prev_note_ref)
+        if current is not None and chain_depths[id(current)] == -1:
+            raise ValueError(f"Prev note chain of note at beat {current.beat} and lane {current.lane} is a cycle")
+        depth = chain_depths[id(current)] if current is not None else -1
+        for linked in reversed(chain):
+            depth += 1
+            chain_depths[id(linked)] = depth
+    return sorted(notes, key=lambda note: (note.beat, chain_depths[id(note)]))
+
+
+class EntityOrderReport(NamedTuple):
+    """Entity order problems found in level data that slow down or break preprocessing.
+
+    Attributes:
+        cursor_resets: The number of notes with an earlier beat than the previous note in their timescale group.
+        forward_prev_refs: The number of notes linking back to a note later in the entity list.
+        detached_timescale_changes: The number of timescale changes not directly following their group.
+    """
+
+    cursor_resets: int
+    forward_prev_refs: int
+    detached_timescale_changes: int
+
+
+def check_entity_order(level_data: LevelData) -> EntityOrderReport:
+    entities = level_data.entities
+    indexes = {id(entity): i for i, entity in enumerate(entities)}
+    last_beats: dict[int, float] = {}
+    cursor_resets = 0
+    forward_prev_refs = 0
+    detached_timescale_changes = 0
+    for i, entity in enumerate(entities):
+        if isinstance(entity, TimescaleChange):
+            if i == 0 or not isinstance(entities[i - 1], TimescaleGroup | TimescaleChange):
+                detached_timescale_changes += 1
+        elif isinstance(entity, Note):
+            group = linked_entity(entity.timescale_group_ref)
+            if entity.beat < last_beats.get(id(group), -1e8):
+                cursor_resets += 1
+            last_beats[id(group)] = entity.beat
+            prev = linked_entity(entity.prev_note_ref)
+            if prev is not None and indexes[id(prev)] > i:
+                forward_prev_refs += 1
+    return EntityOrderReport(cursor_resets, forward_prev_refs, detached_timescale_changes)
+
+
+def report_entity_order(name: str, level_data: LevelData):
+    report = check_entity_order(level_data)
+    if any(report):
+        logger.info(
+            "Entity order %s: %d cursor resets, %d forward prev refs, %d detached timescale changes",
+            name,
+            report.cursor_resets,
+            report.forward_prev_refs,
+            report.detached_timescale_changes,
+        )
@@ -9,6 +9,8 @@ from typing import NamedTuple
 
 from sonolus.script.level import Level, LevelData
 
+from convexity.convert.order import order_notes
+from convexity.convert.timescale import bake_timescale_sections, compact_timescale_changes
 from convexity.play.bpm import BpmChange
 from convexity.play.init import Init
 from convexity.play.lane import Lane
@@ -163,7 +165,7 @@ def convert_osu(data: str, assets: Path) -> Level | None:
             )
             notes.append(start)
             notes.append(end)
-        notes = sorted(notes, key=lambda note: note.beat)
+    notes = order_notes(notes)
 
     notes_by_beat: dict[float, list[Note]] = {}
     for note in notes:
@@ -173,6 +175,8 @@ def convert_osu(data: str, assets: Path) -> Level | None:
         for a, b in itertools.pairwise(group):
             a.sim_note_ref @= b.ref()
 
+    timescale_changes = compact_timescale_changes(timescale_changes, max((note.beat for note in notes), default=0))
+
     return Level(
         name=f"convexity_{metadata['BeatmapSetID']}_{metadata['BeatmapID']}",
         title=f"{metadata['TitleUnicode']} - {metadata['Version']}",
@@ -180,19 +184,21 @@ def convert_osu(data: str, assets: Path) -> Level | None:
         artists=metadata["ArtistUnicode"],
         author=metadata["Creator"],
         bgm=(assets / audio_filename).read_bytes(),
-        data=LevelData(
-            bgm_offset=0,
-            entities=[
-                Init(
-                    base_leniency=1,
-                ),
-                timescale_group,
-                *timescale_changes,
-                *stages,
-                *lanes,
-                *bpm_changes,
-                *notes,
-            ],
+        data=bake_timescale_sections(
+            LevelData(
+                bgm_offset=0,
+                entities=[
+                    Init(
+                        base_leniency=1,
+                    ),
+                    timescale_group,
+                    *timescale_changes,
+                    *stages,
+                    *lanes,
+                    *bpm_changes,
+                    *notes,
+                ],
+            )
         ),
     )
 
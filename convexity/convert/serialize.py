@@ -0,0 +1,129 @@
+import gzip
+import json
+import logging
+
+from sonolus.build.level import build_level_data
+from sonolus.script.level import Level, LevelData
+
+from convexity.convert.timescale import make_beat_to_time, timescale_sections
+
+BEAT_FIELDS = frozenset({"beat", "#BEAT"})
+
+logger = logging.getLogger(__name__)
+
+
+def compact_level_data(level_data: LevelData, beat_grid: int | None = 960, max_beat_error: float = 1e-6) -> dict:
+    """Build level data json without redundant content.
+
+    Fields equal to zero are left out since that is the value Sonolus uses for missing data, integral values are
+    written without a fractional part, and only referenced entities are named, using short names.
+
+    If a beat grid is given, beats within ``max_beat_error`` of a multiple of ``1 / beat_grid`` are written with the
+    fewest digits that stay within ``max_beat_error`` of the original beat and identify the same grid position. Other
+    beats are written as they are, since moving them, and bpm change beats in particular, would shift note times.
+    Shortening is skipped for the whole level if it would merge distinct beats. Baked timescale section tables are
+    recomputed from the written beats.
+    """
+    data = build_level_data(level_data)
+    entities = data["entities"]
+
+    beats = {entry["value"] for entity in entities for entry in entity["data"] if entry["name"] in BEAT_FIELDS}
+    if beat_grid is not None:
+        quantized = {beat: quantize_beat(beat, beat_grid, max_beat_error) for beat in beats}
+        if len(set(quantized.values())) == len(beats):
+            for entity in entities:
+                for entry in entity["data"]:
+                    if entry["name"] in BEAT_FIELDS:
+                        entry["value"] = quantized[entry["value"]]
+            rebake_timescale_sections(entities)
+        else:
+            logger.info("Beat quantization to 1/%d skipped: it would change the chart", beat_grid)
+
+    referenced = {entry["ref"] for entity in entities for entry in entity["data"] if "ref" in entry}
+    names = {name: to_base36(i) for i, name in enumerate(n for n in (e["name"] for e in entities) if n in referenced)}
+
+    compacted = []
+    for entity in entities:
+        entries = []
+        for entry in entity["data"]:
+            if "ref" in entry:
+                entries.append({"name": entry["name"], "ref": names[entry["ref"]]})
+                continue
+            value = entry["value"]
+            if value == 0:
+                continue
+            entries.append({"name": entry["name"], "value": int(value) if float(value).is_integer() else value})
+        result = {"archetype": entity["archetype"], "data": entries}
+        if entity["name"] in names:
+            result["name"] = names[entity["name"]]
+        compacted.append(result)
+
+    return {
+        "bgmOffset": data["bgmOffset"],
+        "entities": compacted,
+    }
+
+
+def quantize_beat(beat: float, beat_grid: int, max_beat_error: float) -> float:
+    position = round(beat * beat_grid)
+    snapped = position / beat_grid
+    if abs(snapped - beat) > max_beat_error:
+        return beat
+    for digits in range(18):
+        value = round(snapped, digits)
+        # The written value has to identify the same grid position when read back.
+        if abs(value - beat) <= max_beat_error and round(value * beat_grid) == position:
+            return value
+    return beat
+
+
+def rebake_timescale_sections(entities: list[dict]):
+    """Recompute the baked section tables of timescale groups in level data json from its current beats."""
+    values = [{entry["name"]: entry["value"] for entry in entity["data"] if "value" in entry} for entity in entities]
+    beat_to_time = make_beat_to_time(
+        [
+            (entity_values.get("#BEAT", 0), entity_values.get("#BPM", 0))
+            for entity, entity_values in zip(entities, values, strict=True)
+            if entity["archetype"] == "#BPM_CHANGE"
+        ]
+    )
+    for i, entity in enumerate(entities):
+        if entity["archetype"] != "TimescaleGroup" or not values[i].get("has_sections", 0):
+            continue
+        end = i + 1
+        while end < len(entities) and entities[end]["archetype"] == "TimescaleChange":
+            end += 1
+        sections = timescale_sections(
+            [(values[j].get("beat", 0), values[j].get("scale", 0)) for j in range(i + 1, end)], beat_to_time
+        )
+        for change, section in zip(entities[i + 1 : end], sections, strict=True):
+            change["data"] = [entry for entry in change["data"] if entry["name"] not in section] + [
+                {"name": name, "value": value} for name, value in section.items()
+            ]
+
+
+def to_base36(n: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    result = ""
+    while True:
+        n, remainder = divmod(n, 36)
+        result = digits[remainder] + result
+        if n == 0:
+            return result
+
+
+def package_compact_level_data(level_data: LevelData, beat_grid: int | None = 960) -> bytes:
+    return gzip.compress(json.dumps(compact_level_data(level_data, beat_grid), separators=(",", ":")).encode("utf-8"))
+
+
+def export_compact_level(level: Level, engine_name: str, beat_grid: int | None = 960):
+    # The level is exported without its data, which is only packaged in compact form.
+    level_data = level.data
+    level.data = LevelData(bgm_offset=0, entities=[])
+    try:
+        exported = level.export(engine_name)
+    finally:
+        level.data = level_data
+    exported.data = package_compact_level_data(level_data, beat_grid)
+    logger.info("Level data %s: %d bytes gzipped", level.name, len(exported.data))
+    return exported
@@ -0,0 +1,182 @@
+import itertools
+from collections.abc import Callable, Mapping
+from types import MappingProxyType
+from typing import NamedTuple
+
+from sonolus.script.level import LevelData
+
+from convexity.common.note import NoteVariant
+from convexity.convert.anchors import remove_collinear_anchors
+from convexity.convert.order import order_notes
+from convexity.convert.timescale import bake_timescale_sections, compact_timescale_changes
+from convexity.convert.utils import parse_entity_data
+from convexity.play.bpm import BpmChange
+from convexity.play.init import Init
+from convexity.play.lane import Lane
+from convexity.play.note import Note
+from convexity.play.stage import Stage
+from convexity.play.timescale import TimescaleChange, TimescaleGroup
+
+
+class NoteMapping(NamedTuple):
+    """How a source note archetype maps to a note.
+
+    Attributes:
+        variant: The note variant, or a function computing it from the entity data.
+        archetype: The archetype to create the note with.
+        direction: A function computing the note direction from the entity data, if the note has one.
+        prev_field: The data field referencing the previous note, if the archetype links to one directly.
+        lane_from_prev: Whether the lane is taken from the previous note instead of the entity data.
+    """
+
+    variant: NoteVariant | Callable[[dict[str, float]], NoteVariant]
+    archetype: type[Note] = Note
+    direction: Callable[[dict[str, float]], float] | None = None
+    prev_field: str | None = None
+    lane_from_prev: bool = False
+
+
+class ConnectorMapping(NamedTuple):
+    """How a source connector archetype links two notes."""
+
+    head_field: str = "head"
+    tail_field: str = "tail"
+
+
+class SonolusSource(NamedTuple):
+    """The conversion table for a Sonolus level source.
+
+    Attributes:
+        lane_count: The number of lanes of the source engine.
+        base_leniency: The base leniency levels from this source are played with.
+        notes: The note archetypes of the source.
+        connectors: The connector archetypes of the source.
+        timescale_changes: The timescale change archetypes of the source.
+        ignored: Archetypes with no equivalent that are skipped.
+        strict: Whether to raise on archetypes not listed in the table.
+    """
+
+    lane_count: int
+    base_leniency: float
+    notes: dict[str, NoteMapping]
+    connectors: Mapping[str, ConnectorMapping] = MappingProxyType({})
+    timescale_changes: frozenset[str] = frozenset()
+    ignored: frozenset[str] = frozenset()
+    strict: bool = True
+
+
+def convert_sonolus_source_level_data(data: dict, source: SonolusSource) -> LevelData:
+    bgm_offset = data["bgmOffset"]
+    raw_entities = data["entities"]
+    indexes_by_name = {e["name"]: i for i, e in enumerate(raw_entities) if "name" in e}
+
+    lane_count = source.lane_count
+
+    stages = [
+        Stage(
+            lane=0,
+            width=lane_count,
+        )
+    ]
+    lanes = [
+        Lane(
+            lane=i - (lane_count - 1) / 2,
+        )
+        for i in range(lane_count)
+    ]
+    notes = []
+    notes_by_index: list[Note | None] = [None] * len(raw_entities)
+    # Links whose notes haven't been created yet when they are found, as (head index, tail index).
+    pending_links: list[tuple[int, int]] = []
+    bpm_changes = []
+    timescale_group = TimescaleGroup()
+    timescale_changes = [
+        TimescaleChange(
+            beat=0,
+            scale=1,
+        )
+    ]
+
+    def link(head_index: int, tail_index: int):
+        head = notes_by_index[head_index]
+        tail = notes_by_index[tail_index]
+        if head is None or tail is None:
+            pending_links.append((head_index, tail_index))
+            return
+        tail.prev_note_ref @= head.ref()
+        if source.notes[raw_entities[tail_index]["archetype"]].lane_from_prev:
+            tail.lane = head.lane
+
+    for i, e in enumerate(raw_entities):
+        archetype = e["archetype"]
+        d = parse_entity_data(e, indexes_by_name)
+        if archetype == "#BPM_CHANGE":
+            bpm_changes.append(
+                BpmChange(
+                    beat=d["#BEAT"],
+                    bpm=d["#BPM"],
+                    meter=4,
+                )
+            )
+        elif (mapping := source.notes.get(archetype)) is not None:
+            note = mapping.archetype(
+                variant=mapping.variant(d) if callable(mapping.variant) else mapping.variant,
+                beat=d["#BEAT"],
+                lane=d["lane"] if not mapping.lane_from_prev else 0,
+                direction=mapping.direction(d) if mapping.direction is not None else 0,
+                timescale_group_ref=timescale_group.ref(),
+            )
+            notes.append(note)
+            notes_by_index[i] = note
+            if mapping.prev_field is not None:
+                link(int(d[mapping.prev_field]), i)
+        elif (connector := source.connectors.get(archetype)) is not None:
+            link(int(d[connector.head_field]), int(d[connector.tail_field]))
+        elif archetype in source.timescale_changes:
+            timescale_changes.append(
+                TimescaleChange(
+                    beat=d["#BEAT"],
+                    scale=d["#TIMESCALE"],
+                )
+            )
+        elif archetype not in source.ignored and source.strict:
+            raise ValueError(f"Unknown archetype: {archetype}")
+
+    for head_index, tail_index in pending_links:
+        if notes_by_index[head_index] is None or notes_by_index[tail_index] is None:
+            raise ValueError(f"Connector references a missing note: {head_index} -> {tail_index}")
+        link(head_index, tail_index)
+
+    # The runtime looks up the current beat by binary searching bpm changes in entity order.
+    bpm_changes.sort(key=lambda c: c.beat)
+    notes = remove_collinear_anchors(notes, [c.beat for c in bpm_changes] + [c.beat for c in timescale_changes])
+    notes.sort(key=lambda note: note.beat)
+    for a, b in itertools.pairwise(notes):
+        if a.beat != b.beat and abs(a.beat - b.beat) < 0.002:
+            b.beat = a.beat
+    notes_by_beat: dict[float, list[Note]] = {}
+    for note in notes:
+        notes_by_beat.setdefault(note.beat, []).append(note)
+    for group in notes_by_beat.values():
+        group.sort(key=lambda note: note.lane)
+        for a, b in itertools.pairwise(n for n in group if n.variant != NoteVariant.HOLD_ANCHOR):
+            a.sim_note_ref @= b.ref()
+
+    notes = order_notes(notes)
+    timescale_changes = compact_timescale_changes(timescale_changes, max((note.beat for note in notes), default=0))
+
+    level_data = LevelData(
+        bgm_offset=bgm_offset,
+        entities=[
+            Init(
+                base_leniency=source.base_leniency,
+            ),
+            timescale_group,
+            *timescale_changes,
+            *stages,
+            *lanes,
+            *bpm_changes,
+            *notes,
+        ],
+    )
+    return bake_timescale_sections(level_data)
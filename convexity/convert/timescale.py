@@ -0,0 +1,114 @@
+import bisect
+import itertools
+import logging
+from collections.abc import Callable
+
+from sonolus.script.level import LevelData
+
+from convexity.play.bpm import BpmChange
+from convexity.play.timescale import TimescaleChange, TimescaleGroup
+
+logger = logging.getLogger(__name__)
+
+
+def compact_timescale_changes(changes: list[TimescaleChange], last_beat: float) -> list[TimescaleChange]:
+    """Drop timescale changes that don't affect note positions.
+
+    Changes are expected in ascending beat order, as the runtime requires. Removed are sections with zero length,
+    changes that repeat the current scale, and changes past the first one after the last note, since no note is
+    ever positioned with them.
+    """
+    compacted: list[TimescaleChange] = []
+    for change in changes:
+        # The runtime treats every change at or before beat 0 as starting at the same time.
+        if compacted and max(compacted[-1].beat, 0) == max(change.beat, 0):
+            compacted.pop()
+        if compacted and compacted[-1].beat > last_beat:
+            break
+        if compacted and compacted[-1].scale == change.scale:
+            continue
+        compacted.append(change)
+    if len(compacted) < len(changes):
+        logger.info("Compacted timescale changes: %d -> %d", len(changes), len(compacted))
+    return compacted
+
+
+def make_beat_to_time(bpm_changes: list[tuple[float, float]]) -> Callable[[float], float]:
+    """Make a function converting beats to times the way the runtime does.
+
+    Args:
+        bpm_changes: The bpm changes of the level as (beat, bpm) pairs.
+
+    Returns:
+        A function returning the time in seconds at a beat.
+    """
+    # Without bpm changes the runtime plays at 60 bpm.
+    bpm_changes = sorted(bpm_changes) or [(0.0, 60.0)]
+    bpm_beats = [beat for beat, _ in bpm_changes]
+    bpm_times = [0.0]
+    for (beat, bpm), (next_beat, _) in itertools.pairwise(bpm_changes):
+        bpm_times.append(bpm_times[-1] + (next_beat - beat) * 60 / bpm)
+
+    def beat_to_time(beat: float) -> float:
+        i = max(bisect.bisect_right(bpm_beats, beat) - 1, 0)
+        return bpm_times[i] + (beat - bpm_beats[i]) * 60 / bpm_changes[i][1]
+
+    return beat_to_time
+
+
+def timescale_sections(
+    changes: list[tuple[float, float]], beat_to_time: Callable[[float], float]
+) -> list[dict[str, float]]:
+    """Compute the section tables of the timescale changes of a group the way the runtime does.
+
+    Args:
+        changes: The timescale changes of the group as (beat, scale) pairs, in level data order.
+        beat_to_time: The beat to time conversion of the level.
+
+    Returns:
+        The section table fields of every change by field name.
+    """
+
+    def start_time(beat: float) -> float:
+        return beat_to_time(beat) if beat > 0 else -10
+
+    sections = []
+    forward_scaled_time = 0.0
+    reverse_scaled_time = 0.0
+    for (beat, scale), next_change in zip(changes, [*changes[1:], None], strict=True):
+        section = {
+            "start_time": start_time(beat),
+            "end_time": start_time(next_change[0]) if next_change is not None else 1e8,
+            "forward_start_scaled_time": forward_scaled_time,
+            "reverse_start_scaled_time": reverse_scaled_time,
+        }
+        forward_scaled_time += scale * (section["end_time"] - section["start_time"])
+        reverse_scaled_time -= scale * (section["end_time"] - section["start_time"])
+        section["forward_end_scaled_time"] = forward_scaled_time
+        section["reverse_end_scaled_time"] = reverse_scaled_time
+        sections.append(section)
+    return sections
+
+
+def bake_timescale_sections(level_data: LevelData) -> LevelData:
+    """Fill in the section tables of every timescale group so the runtime doesn't build them on load.
+
+    Tables are computed for both scroll directions, so they are valid for every soflan mode.
+    """
+    entities = level_data.entities
+    beat_to_time = make_beat_to_time(
+        [(entity.beat, entity.bpm) for entity in entities if isinstance(entity, BpmChange)]
+    )
+
+    for i, group in enumerate(entities):
+        if not isinstance(group, TimescaleGroup):
+            continue
+        group.has_sections = True
+        changes = list(
+            itertools.takewhile(lambda e: isinstance(e, TimescaleChange), itertools.islice(entities, i + 1, None))
+        )
+        sections = timescale_sections([(change.beat, change.scale) for change in changes], beat_to_time)
+        for change, section in zip(changes, sections, strict=True):
+            for field, value in section.items():
+                setattr(change, field, value)
+    return level_data
@@ -8,6 +8,7 @@ from typing import NamedTuple
 from urllib.parse import urljoin
 from urllib.request import Request, urlopen
 
+from sonolus.script.archetype import EntityRef
 from sonolus.script.level import Level, LevelData
 from sonolus.script.metadata import Tag
 
@@ -35,7 +36,10 @@ def get_json(url: str) -> dict | list:
 
 
 def get_json_gzip(url: str) -> dict | list:
-    data = get_bytes(url)
+    return decode_json_gzip(get_bytes(url))
+
+
+def decode_json_gzip(data: bytes) -> dict | list:
     return json.loads(gzip.decompress(data).decode("utf-8"))
 
 
@@ -55,12 +59,24 @@ def parse_entities(data: list[dict]) -> list[EntityData]:
     return [
         EntityData(
             archetype=e["archetype"],
-            data={d["name"]: d["value"] if "value" in d else indexes_by_name.get(d["ref"], 0) for d in e["data"]},
+            data=parse_entity_data(e, indexes_by_name),
         )
         for e in data
     ]
 
 
+def parse_entity_data(entity: dict, indexes_by_name: dict[str, int]) -> dict[str, float]:
+    return {d["name"]: d["value"] if "value" in d else indexes_by_name.get(d["ref"], 0) for d in entity["data"]}
+
+
+def linked_entity(ref: EntityRef):
+    """Get the entity a reference made while converting points to, or None if it isn't set."""
+    # References to entities that aren't exported yet have an index of -1, while unset references stay at 0.
+    if ref.index == 0:
+        return None
+    return ref.get()
+
+
 def get_sonolus_level_item(name: str, base_url: str) -> dict:
     return get_json(urljoin(urljoin(base_url, "sonolus/levels/"), name + "?localization=en"))["item"]
 
@@ -108,7 +124,13 @@ def write_playlist_items(path: PathLike, tag: str | None, items: list[dict]):
         (pl_path / "item.json").write_text(json.dumps(item, ensure_ascii=False), encoding="utf-8")
 
 
-def convert_sonolus_level_item(item: dict, base_url: str, tag: str | None, data_converter: Callable[[dict], LevelData]):
+def convert_sonolus_level_item(
+    item: dict,
+    base_url: str,
+    tag: str | None,
+    data_converter: Callable[[dict], LevelData],
+    data: LevelData | None = None,
+):
     tags = [Tag(title=tag["title"], icon=tag.get("icon")) for tag in item["tags"]]
     if tag:
         tags.append(Tag(title=tag))
@@ -125,5 +147,7 @@ def convert_sonolus_level_item(item: dict, base_url: str, tag: str | None, data_
         preview=get_bytes(urljoin(base_url, item["preview"]["url"].replace(" ", "%20")))
         if item.get("preview")
         else None,
-        data=data_converter(get_json_gzip(urljoin(base_url, make_relative(item["data"]["url"].replace(" ", "%20"))))),
+        data=data
+        if data is not None
+        else data_converter(get_json_gzip(urljoin(base_url, make_relative(item["data"]["url"].replace(" ", "%20"))))),
     )
@@ -1,4 +1,7 @@
-from sonolus.script.archetype import PlayArchetype, StandardArchetypeName, StandardImport, imported
+from sonolus.script.archetype import PlayArchetype, StandardArchetypeName, StandardImport, entity_data, imported
+from sonolus.script.timing import beat_to_time
+
+from convexity.common.note import add_bpm_change
 
 
 class BpmChange(PlayArchetype):
@@ -8,6 +11,12 @@ class BpmChange(PlayArchetype):
     bpm: StandardImport.BPM
     meter: int = imported()
 
+    time: float = entity_data()
+
+    def preprocess(self):
+        self.time = beat_to_time(self.beat)
+        add_bpm_change(self.index, self.beat)
+
     def should_spawn(self) -> bool:
         return True
 
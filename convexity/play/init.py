@@ -13,8 +13,9 @@ from sonolus.script.vec import Vec2
 
 from convexity.common.init import init_buckets, init_life, init_score
 from convexity.common.layout import init_layout, update_backspin
-from convexity.common.note import update_current_beat
+from convexity.common.note import update_current_beat, update_frame_constants
 from convexity.common.options import Options
+from convexity.play.bpm import BpmChange
 from convexity.play.config import PlayConfig
 from convexity.play.input_manager import InputFinalizer, InputManager
 from convexity.play.note import Note
@@ -43,9 +44,11 @@ class Init(PlayArchetype):
         InputManager.spawn()
         InputFinalizer.spawn()
 
+    @callback(order=-1)
     def update_sequential(self):
-        update_current_beat()
+        update_current_beat(BpmChange)
         update_backspin()
+        update_frame_constants()
 
 
 def init_ui():
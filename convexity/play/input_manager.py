@@ -1,55 +1,199 @@
 from collections.abc import Iterable
+from math import floor
 
 from sonolus.script.archetype import PlayArchetype, callback
+from sonolus.script.array import Array
 from sonolus.script.containers import VarArray
 from sonolus.script.globals import level_memory
+from sonolus.script.interval import clamp
 from sonolus.script.quad import Quad
 from sonolus.script.runtime import Touch, time, touches
-from sonolus.script.values import copy
+from sonolus.script.values import copy, zeros
 from sonolus.script.vec import Vec2
 
-from convexity.common.layout import Layer, Layout
+from convexity.common.layout import EPSILON, LanePosition, Layer, Layout, touch_pos_to_lane
 from convexity.common.options import Options
 from convexity.common.skin import Skin
 from convexity.common.streams import Streams
 
-input_note_indexes = level_memory(VarArray[int, 16])
 used_touch_ids = level_memory(VarArray[int, 16])
 empty_touch_lanes = level_memory(VarArray[float, 16])
 
+MAX_INDEXED_TOUCHES = 16
+LANE_BUCKET_COUNT = 16
+# Notes closer in time than this narrow each other's hitboxes.
+NEAR_TIME_WINDOW = 0.005
+NEAR_TIME_BUCKET_COUNT = 512
+
+
+@level_memory
+class TouchIndex:
+    # Started touches of the frame by lane bucket. The touch slots in bucket b are slots[bucket_starts[b]] up to
+    # slots[bucket_starts[b + 1]].
+    slots: Array[int, MAX_INDEXED_TOUCHES]
+    bucket_starts: Array[int, LANE_BUCKET_COUNT + 1]
+    # By touch slot, for the first MAX_INDEXED_TOUCHES touches of the frame.
+    ids: Array[int, MAX_INDEXED_TOUCHES]
+    lanes: Array[float, MAX_INDEXED_TOUCHES]
+    used: Array[bool, MAX_INDEXED_TOUCHES]
+    touch_count: int
+
+
+@level_memory
+class InputNoteIndex:
+    # First note of each lane bucket accepting input this frame, with the rest linked through Note.next_input_index.
+    heads: Array[int, LANE_BUCKET_COUNT]
+    max_half_width: float
+
+
+@level_memory
+class NearTimeIndex:
+    # Notes by target time in buckets of NEAR_TIME_WINDOW, hashed into a fixed number of lists linked through
+    # Note.near_time_next_index. Filled in preprocess.
+    heads: Array[int, NEAR_TIME_BUCKET_COUNT]
+
 
 def touch_is_used(touch: Touch) -> bool:
     return touch.id in used_touch_ids
 
 
 def mark_touch_used(touch: Touch):
-    used_touch_ids.set_add(touch.id)
+    mark_touch_id_used(touch.id)
 
 
 def mark_touch_id_used(touch_id: int):
     used_touch_ids.set_add(touch_id)
+    for i in range(TouchIndex.bucket_starts[LANE_BUCKET_COUNT]):
+        slot = TouchIndex.slots[i]
+        if TouchIndex.ids[slot] == touch_id:
+            TouchIndex.used[slot] = True
 
 
-def add_empty_touch_lane(index: float):
-    empty_touch_lanes.append(index)
+def touch_slot(touch_id: int) -> int:
+    """Get the slot of a touch in the touch index, or -1 if it is not indexed."""
+    for slot in range(TouchIndex.touch_count):
+        if TouchIndex.ids[slot] == touch_id:
+            return slot
+    return -1
 
 
-def unused_touches() -> Iterable[Touch]:
-    return filter(lambda touch: not touch_is_used(touch), touches())
+def add_empty_touch_lane(index: float):
+    empty_touch_lanes.append(index)
 
 
-def taps() -> Iterable[Touch]:
-    return filter(lambda touch: touch.started, unused_touches())
+def touch_hitbox_x(position: Vec2, lane: float) -> float:
+    # The stage x that lane_hitbox tests a touch position against, reusing the inverse transform of its lane.
+    if Options.angled_hitboxes or Options.arc:
+        return lane * Options.lane_width * (1 + Options.lane_spacing)
+    return position.x / Layout.scale
+
+
+def x_to_lane_bucket(x: float) -> int:
+    lane = x / Options.lane_width / (1 + Options.lane_spacing)
+    return clamp(floor(lane) + LANE_BUCKET_COUNT // 2, 0, LANE_BUCKET_COUNT - 1)
+
+
+def index_touches():
+    """Compute the lanes of the touches of the frame and sort the started ones into lane buckets."""
+    for bucket in range(LANE_BUCKET_COUNT + 1):
+        TouchIndex.bucket_starts[bucket] = 0
+    # Counting sort, with bucket_starts first holding the end of each bucket and then moved back to its start.
+    slot_buckets = zeros(Array[int, MAX_INDEXED_TOUCHES])
+    count = 0
+    TouchIndex.touch_count = min(len(touches()), MAX_INDEXED_TOUCHES)
+    for slot in range(TouchIndex.touch_count):
+        touch = touches()[slot]
+        lane = touch_pos_to_lane(touch.position)
+        TouchIndex.ids[slot] = touch.id
+        TouchIndex.lanes[slot] = lane
+        if not touch.started:
+            continue
+        bucket = x_to_lane_bucket(touch_hitbox_x(touch.position, lane))
+        slot_buckets[count] = bucket
+        TouchIndex.slots[count] = slot
+        TouchIndex.used[slot] = False
+        TouchIndex.bucket_starts[bucket] += 1
+        count += 1
+    for bucket in range(1, LANE_BUCKET_COUNT):
+        TouchIndex.bucket_starts[bucket] += TouchIndex.bucket_starts[bucket - 1]
+    TouchIndex.bucket_starts[LANE_BUCKET_COUNT] = count
+    slots = copy(TouchIndex.slots)
+    i = count - 1
+    while i >= 0:
+        bucket = slot_buckets[i]
+        TouchIndex.bucket_starts[bucket] -= 1
+        TouchIndex.slots[TouchIndex.bucket_starts[bucket]] = slots[i]
+        i -= 1
+
+
+def push_input_note(index: int, hitbox_pos: LanePosition) -> int:
+    """Add a note to the input note index, returning the index of the next note in its bucket."""
+    bucket = x_to_lane_bucket(hitbox_pos.mid)
+    next_index = InputNoteIndex.heads[bucket]
+    InputNoteIndex.heads[bucket] = index
+    InputNoteIndex.max_half_width = max(InputNoteIndex.max_half_width, (hitbox_pos.right - hitbox_pos.left) / 2)
+    return next_index
+
+
+def input_note_buckets(hitbox_pos: LanePosition) -> range:
+    """Get the lane buckets that may hold input notes with hitboxes overlapping the given one."""
+    return range(
+        x_to_lane_bucket(hitbox_pos.left - InputNoteIndex.max_half_width),
+        x_to_lane_bucket(hitbox_pos.right + InputNoteIndex.max_half_width) + 1,
+    )
+
+
+def unindexed_touches() -> Iterable[Touch]:
+    """Get the touches of the frame past the first MAX_INDEXED_TOUCHES, which aren't in the touch index."""
+    for i in range(TouchIndex.touch_count, len(touches())):
+        yield touches()[i]
+
+
+def near_time_bucket(target_time: float) -> int:
+    return (floor(target_time / NEAR_TIME_WINDOW) % NEAR_TIME_BUCKET_COUNT + NEAR_TIME_BUCKET_COUNT) % (
+        NEAR_TIME_BUCKET_COUNT
+    )
+
+
+def push_near_time_note(index: int, target_time: float) -> int:
+    """Add a note to the near time index, returning the index of the next note in its list."""
+    bucket = near_time_bucket(target_time)
+    next_index = NearTimeIndex.heads[bucket]
+    NearTimeIndex.heads[bucket] = index
+    return next_index
+
+
+def lane_taps(pos: LanePosition) -> Iterable[Touch]:
+    """Get the unused touches started this frame that may be within a lane hitbox.
+
+    Indexed touches come first, ordered by lane bucket, followed by any touches that didn't fit in the index.
+    """
+    start = TouchIndex.bucket_starts[x_to_lane_bucket(pos.left - EPSILON)]
+    end = TouchIndex.bucket_starts[x_to_lane_bucket(pos.right + EPSILON) + 1]
+    unindexed_count = len(touches()) - TouchIndex.touch_count
+    for i in range(start, end + unindexed_count):
+        if i < end:
+            slot = TouchIndex.slots[i]
+            is_tap = not TouchIndex.used[slot]
+        else:
+            slot = TouchIndex.touch_count + i - end
+            is_tap = touches()[slot].started and not touch_is_used(touches()[slot])
+        if is_tap:
+            yield touches()[slot]
 
 
 class InputManager(PlayArchetype):
     @callback(order=-1)
     def update_sequential(self):
-        input_note_indexes.clear()
+        for bucket in range(LANE_BUCKET_COUNT):
+            InputNoteIndex.heads[bucket] = 0
+        InputNoteIndex.max_half_width = 0
         used_touch_ids.clear()
         empty_touch_lanes.clear()
 
+    @callback(order=-1)
     def touch(self):
+        index_touches()
         if Options.touch_lines:
             w = 0.02
             for touch in touches():
@@ -8,7 +8,7 @@ from convexity.common.layout import (
     lane_to_pos,
 )
 from convexity.common.options import Options
-from convexity.play.input_manager import add_empty_touch_lane, unused_touches
+from convexity.play.input_manager import add_empty_touch_lane, lane_taps
 
 
 class Lane(PlayArchetype):
@@ -32,9 +32,7 @@ class Lane(PlayArchetype):
 
     @callback(order=1)
     def touch(self):
-        for touch in unused_touches():
-            if not touch.started:
-                continue
+        for touch in lane_taps(self.pos):
             if self.hitbox.contains_point(touch.position):
                 play_lane_effects(self.pos)
                 add_empty_touch_lane(self.index)
@@ -14,6 +14,7 @@ from sonolus.script.archetype import (
 from sonolus.script.bucket import Bucket, Judgment, JudgmentWindow
 from sonolus.script.interval import Interval, lerp, unlerp
 from sonolus.script.particle import Particle
+from sonolus.script.quad import Quad
 from sonolus.script.runtime import input_offset, time, touches
 from sonolus.script.sprite import Sprite
 from sonolus.script.stream import Stream
@@ -32,6 +33,7 @@ from convexity.common.layout import (
     touch_pos_to_lane,
 )
 from convexity.common.note import (
+    MAX_PREV_LOOKBACK,
     HoldHandle,
     NoteVariant,
     draw_note_arrow,
@@ -62,7 +64,22 @@ from convexity.common.note import (
 from convexity.common.options import Options, SoflanMode
 from convexity.common.streams import Streams
 from convexity.play.config import PlayConfig
-from convexity.play.input_manager import input_note_indexes, mark_touch_id_used, mark_touch_used, taps, touch_is_used
+from convexity.play.input_manager import (
+    NEAR_TIME_WINDOW,
+    InputNoteIndex,
+    NearTimeIndex,
+    TouchIndex,
+    input_note_buckets,
+    lane_taps,
+    mark_touch_id_used,
+    mark_touch_used,
+    near_time_bucket,
+    push_input_note,
+    push_near_time_note,
+    touch_is_used,
+    touch_slot,
+    unindexed_touches,
+)
 from convexity.play.timescale import TimescaleGroup
 
 
@@ -86,6 +103,12 @@ class Note(PlayArchetype):
     base_hitbox_pos: LanePosition = shared_memory()
     right_vec: Vec2 = shared_memory()
     hold_handle: HoldHandle = shared_memory()
+    # Next note in the same lane bucket of the input note index.
+    next_input_index: int = shared_memory()
+    # Whether the note is in the input note index this frame.
+    accepts_input: bool = shared_memory()
+    # Next note in the same list of the near time index.
+    near_time_next_index: int = shared_memory()
 
     target_time: float = entity_data()
     input_target_time: float = entity_data()
@@ -103,10 +126,22 @@ class Note(PlayArchetype):
     start_time: float = entity_data()
     target_scaled_time: float = entity_data()
     next_note_ref: EntityRef[Note] = entity_data()
+    # Notes of the same chord, as linked by sim_note_ref before sim lines skip ticks.
+    chord_next_ref: EntityRef[Note] = entity_data()
+    chord_prev_ref: EntityRef[Note] = entity_data()
 
     started: bool = entity_memory()
+    # First unfinished note among the previous notes, found by update_effective_prev.
+    effective_prev_ref: EntityRef[Note] = entity_memory()
+    effective_prev_depth: int = entity_memory()
     tracking_lane: float = entity_memory()
     is_tracking: bool = entity_memory()
+    # Hitbox halves narrowed against the rest of the chord, valid while the whole chord is waiting for input.
+    chord_left_hitbox: Quad = entity_memory()
+    chord_right_hitbox: Quad = entity_memory()
+    # Whether a note outside the chord is close enough in time to narrow the hitbox, in which case the cached hitbox
+    # isn't used.
+    has_near_notes: bool = entity_memory()
 
     finish_time: float = exported()
     judgment: Judgment = exported()
@@ -159,6 +194,7 @@ class Note(PlayArchetype):
 
         if self.variant != NoteVariant.HOLD_ANCHOR:
             schedule_auto_hit_sfx(self.variant, Judgment.PERFECT, self.target_time)
+            self.near_time_next_index = push_near_time_note(self.index, self.target_time)
 
         if self.has_prev and not (Options.boxy_sliders and self.variant == NoteVariant.HOLD_ANCHOR):
             self.prev_note_ref.get().next_note_ref @= self.ref()
@@ -166,6 +202,10 @@ class Note(PlayArchetype):
         self.tracking_lane = 0
         self.is_tracking = False
 
+        self.chord_next_ref @= self.sim_note_ref
+        if self.has_sim:
+            self.sim_note.chord_prev_ref @= self.ref()
+
         if not Options.tick_sim_lines:
             if self.variant == NoteVariant.HOLD_TICK:
                 self.sim_note_ref.index = 0
@@ -179,6 +219,24 @@ class Note(PlayArchetype):
     def spawn_order(self) -> float:
         return self.spawn_time()
 
+    def initialize(self):
+        self.effective_prev_ref @= self.prev_note_ref
+        # Chord partners are preprocessed by now, so the narrowed hitbox only has to be built once.
+        hitbox_pos = copy(self.base_hitbox_pos)
+        ref = copy(self.chord_next_ref)
+        while ref.index > 0:
+            if ref.get().variant != NoteVariant.HOLD_ANCHOR:
+                hitbox_pos @= self.narrow_hitbox_pos(hitbox_pos, ref.get())
+            ref @= ref.get().chord_next_ref
+        ref @= self.chord_prev_ref
+        while ref.index > 0:
+            if ref.get().variant != NoteVariant.HOLD_ANCHOR:
+                hitbox_pos @= self.narrow_hitbox_pos(hitbox_pos, ref.get())
+            ref @= ref.get().chord_prev_ref
+        self.chord_left_hitbox @= lane_hitbox(LanePosition(left=hitbox_pos.left, right=hitbox_pos.mid + 1e-3))
+        self.chord_right_hitbox @= lane_hitbox(LanePosition(left=hitbox_pos.mid, right=hitbox_pos.right))
+        self.has_near_notes = self.find_near_notes()
+
     def should_spawn(self) -> bool:
         return time() >= self.spawn_time()
 
@@ -192,17 +250,17 @@ class Note(PlayArchetype):
             self.sim_note.update_pos()
         if self.variant == NoteVariant.HOLD_ANCHOR:
             self.input_finished = self.prev.input_finished or self.prev.is_despawned
-        if (
+        self.accepts_input = (
             not self.input_finished
             and self.touch_id == 0
             and (
                 not self.has_prev or (self.prev.touch_id == 0 and (self.prev.input_finished or self.prev.is_despawned))
             )
             and time() >= self.input_time.start
-            and not input_note_indexes.is_full()
             and self.variant != NoteVariant.HOLD_ANCHOR
-        ):
-            input_note_indexes.append(self.index)
+        )
+        if self.accepts_input:
+            self.next_input_index = push_input_note(self.index, self.base_hitbox_pos)
         if self.has_prev and self.prev.is_despawned and self.prev.touch_id == 0:
             if self.hold_handle == self.prev.hold_handle:
                 self.hold_handle.destroy()
@@ -238,19 +296,27 @@ class Note(PlayArchetype):
                 y=self.y,
             )
 
+    def update_effective_prev(self):
+        # Handle a tick finishing before previous anchors by looking further back. Notes stay finished once finished,
+        # so the search resumes where it stopped and moves back at most MAX_PREV_LOOKBACK times over the life of
+        # the note. A depth of MAX_PREV_LOOKBACK means every note looked at is finished.
+        while self.effective_prev_depth < MAX_PREV_LOOKBACK and self.effective_prev.finished:
+            if self.effective_prev.has_prev:
+                self.effective_prev_ref @= self.effective_prev.prev_note_ref
+                self.effective_prev_depth += 1
+            else:
+                self.effective_prev_depth = MAX_PREV_LOOKBACK
+
+    @property
+    def effective_prev(self) -> Note:
+        return self.effective_prev_ref.get()
+
     def draw_connector(self):
         if not self.has_prev:
             return
-        prev_finished = True
-        ref = copy(self.prev_note_ref)
-        for _ in range(20):
-            # Handle a tick finishing before previous anchors by looking further back.
-            prev_finished = prev_finished and ref.get().finished
-            if not prev_finished:
-                break
-            if not ref.get().has_prev:
-                break
-            ref @= ref.get().prev_note_ref
+        self.update_effective_prev()
+        prev_finished = self.effective_prev_depth >= MAX_PREV_LOOKBACK
+        ref = copy(self.effective_prev_ref)
         if prev_finished:
             ref @= self.prev_note_ref
         prev = ref.get()
@@ -338,16 +404,9 @@ class Note(PlayArchetype):
             return
         if not self.has_prev:
             return
-        prev_finished = True
-        ref = copy(self.prev_note_ref)
-        for _ in range(20):
-            # Handle a tick finishing before previous anchors by looking further back.
-            prev_finished = prev_finished and ref.get().finished
-            if not prev_finished:
-                break
-            if not ref.get().has_prev:
-                break
-            ref @= ref.get().prev_note_ref
+        self.update_effective_prev()
+        prev_finished = self.effective_prev_depth >= MAX_PREV_LOOKBACK
+        ref = copy(self.effective_prev_ref)
         if prev_finished:
             ref @= self.prev_note_ref
         prev = ref.get()
@@ -405,18 +464,24 @@ class Note(PlayArchetype):
             case NoteVariant.SWING:
                 self.handle_swing_input()
         if self.touch_id != 0:
-            for touch in touches():
-                if touch.id == self.touch_id:
-                    self.tracking_lane = touch_pos_to_lane(touch.position)
-                    self.tracking_stream[time()] = self.tracking_lane
-                    self.is_tracking = True
-                    break
+            slot = touch_slot(self.touch_id)
+            if slot >= 0:
+                self.tracking_lane = TouchIndex.lanes[slot]
+                self.tracking_stream[time()] = self.tracking_lane
+                self.is_tracking = True
+            else:
+                for touch in unindexed_touches():
+                    if touch.id == self.touch_id:
+                        self.tracking_lane = touch_pos_to_lane(touch.position)
+                        self.tracking_stream[time()] = self.tracking_lane
+                        self.is_tracking = True
+                        break
 
     def handle_tap_input(self):
         if time() not in self.input_time:
             return
         hitbox = self.get_hitbox()
-        for touch in taps():
+        for touch in lane_taps(self.base_hitbox_pos):
             if not hitbox(touch.position):
                 continue
             mark_touch_used(touch)
@@ -475,7 +540,7 @@ class Note(PlayArchetype):
                 else:
                     self.fail(time() - input_offset())
             else:
-                for touch in taps():
+                for touch in lane_taps(self.base_hitbox_pos):
                     if not hitbox(touch.position):
                         continue
                     mark_touch_used(touch)
@@ -532,7 +597,7 @@ class Note(PlayArchetype):
             elif time() not in self.input_time:
                 return
             else:
-                for touch in taps():
+                for touch in lane_taps(self.base_hitbox_pos):
                     if not hitbox(touch.position):
                         continue
                     mark_touch_used(touch)
@@ -655,37 +720,102 @@ class Note(PlayArchetype):
             self.fail(time() - input_offset())
 
     def get_hitbox(self) -> Callable[[Vec2], bool]:
-        hitbox_pos = copy(self.base_hitbox_pos)
-        if self.touch_id != 0 or (self.has_prev and self.prev.touch_id != 0):
-            pass
-        else:
-            own_mid = self.base_hitbox_pos.mid
-            for other_index in input_note_indexes:
-                if other_index == self.index:
-                    continue
-                other = Note.at(other_index)
-                if other.input_finished or abs(other.target_time - self.target_time) > 0.005 or other.touch_id != 0:
-                    continue
-                other_mid = other.base_hitbox_pos.mid
-                if other_mid > own_mid and self.base_hitbox_pos.right > other.base_hitbox_pos.left:
-                    hitbox_pos.right = min(
-                        hitbox_pos.right,
-                        (self.base_hitbox_pos.right + other.base_hitbox_pos.left) / 2,
-                    )
-                elif other_mid < own_mid and self.base_hitbox_pos.left < other.base_hitbox_pos.right:
-                    hitbox_pos.left = max(
-                        hitbox_pos.left,
-                        (self.base_hitbox_pos.left + other.base_hitbox_pos.right) / 2,
-                    )
-        # Splitting up the hitbox to prevent issues with it wrapping around with arc and high tilt
-        left_hitbox = lane_hitbox(LanePosition(left=hitbox_pos.left, right=hitbox_pos.mid + 1e-3))
-        right_hitbox = lane_hitbox(LanePosition(left=hitbox_pos.mid, right=hitbox_pos.right))
+        left_hitbox = copy(self.chord_left_hitbox)
+        right_hitbox = copy(self.chord_right_hitbox)
+        is_held = self.touch_id != 0 or (self.has_prev and self.prev.touch_id != 0)
+        if is_held or self.has_near_notes or not self.chord_is_waiting():
+            hitbox_pos = copy(self.base_hitbox_pos)
+            if not is_held:
+                for bucket in input_note_buckets(self.base_hitbox_pos):
+                    other_index = InputNoteIndex.heads[bucket]
+                    while other_index != 0:
+                        other = Note.at(other_index)
+                        other_index = other.next_input_index
+                        if other.index == self.index:
+                            continue
+                        if (
+                            other.input_finished
+                            or abs(other.target_time - self.target_time) > NEAR_TIME_WINDOW
+                            or other.touch_id != 0
+                        ):
+                            continue
+                        hitbox_pos @= self.narrow_hitbox_pos(hitbox_pos, other)
+            # Splitting up the hitbox to prevent issues with it wrapping around with arc and high tilt
+            left_hitbox @= lane_hitbox(LanePosition(left=hitbox_pos.left, right=hitbox_pos.mid + 1e-3))
+            right_hitbox @= lane_hitbox(LanePosition(left=hitbox_pos.mid, right=hitbox_pos.right))
 
         def hitbox(position: Vec2):
             return left_hitbox.contains_point(position) or right_hitbox.contains_point(position)
 
         return hitbox
 
+    def chord_is_waiting(self) -> bool:
+        # Whether every other note of the chord is in the input note index and unclaimed. Without near notes outside
+        # the chord, the hitbox narrowed at initialization is then the one dynamic narrowing would give.
+        ref = copy(self.chord_next_ref)
+        while ref.index > 0:
+            other = ref.get()
+            if other.variant != NoteVariant.HOLD_ANCHOR and not (
+                other.accepts_input and not other.input_finished and other.touch_id == 0
+            ):
+                return False
+            ref @= other.chord_next_ref
+        ref @= self.chord_prev_ref
+        while ref.index > 0:
+            other = ref.get()
+            if other.variant != NoteVariant.HOLD_ANCHOR and not (
+                other.accepts_input and not other.input_finished and other.touch_id == 0
+            ):
+                return False
+            ref @= other.chord_prev_ref
+        return True
+
+    def find_near_notes(self) -> bool:
+        # Every note is preprocessed by now, so the near time index is complete.
+        if self.variant == NoteVariant.HOLD_ANCHOR:
+            return False
+        for offset in range(-1, 2):
+            other_index = NearTimeIndex.heads[near_time_bucket(self.target_time + offset * NEAR_TIME_WINDOW)]
+            while other_index != 0:
+                other = Note.at(other_index)
+                other_index = other.near_time_next_index
+                if (
+                    other.index != self.index
+                    and abs(other.target_time - self.target_time) <= NEAR_TIME_WINDOW
+                    and not self.is_chord_partner(other.index)
+                ):
+                    return True
+        return False
+
+    def is_chord_partner(self, index: int) -> bool:
+        ref = copy(self.chord_next_ref)
+        while ref.index > 0:
+            if ref.index == index:
+                return True
+            ref @= ref.get().chord_next_ref
+        ref @= self.chord_prev_ref
+        while ref.index > 0:
+            if ref.index == index:
+                return True
+            ref @= ref.get().chord_prev_ref
+        return False
+
+    def narrow_hitbox_pos(self, hitbox_pos: LanePosition, other: Note) -> LanePosition:
+        result = copy(hitbox_pos)
+        own_mid = self.base_hitbox_pos.mid
+        other_mid = other.base_hitbox_pos.mid
+        if other_mid > own_mid and self.base_hitbox_pos.right > other.base_hitbox_pos.left:
+            result.right = min(
+                result.right,
+                (self.base_hitbox_pos.right + other.base_hitbox_pos.left) / 2,
+            )
+        elif other_mid < own_mid and self.base_hitbox_pos.left < other.base_hitbox_pos.right:
+            result.left = max(
+                result.left,
+                (self.base_hitbox_pos.left + other.base_hitbox_pos.right) / 2,
+            )
+        return result
+
     def complete(self, actual_time: float):
         judgment = self.window.judge(actual=actual_time, target=self.target_time)
         self.judgment = judgment
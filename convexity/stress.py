@@ -0,0 +1,221 @@
+import argparse
+import itertools
+import random
+from pathlib import Path
+from typing import NamedTuple
+
+from sonolus.script.level import Level, LevelData
+
+from convexity.common.note import NoteVariant
+from convexity.convert.cache import cached_levels
+from convexity.convert.order import order_notes
+from convexity.convert.timescale import bake_timescale_sections
+from convexity.play.bpm import BpmChange
+from convexity.play.init import Init
+from convexity.play.lane import Lane
+from convexity.play.note import Note, UnscoredNote
+from convexity.play.stage import Stage
+from convexity.play.timescale import TimescaleChange, TimescaleGroup
+
+
+class StressParams(NamedTuple):
+    """Parameters of a generated stress level.
+
+    Attributes:
+        duration: The length of the chart in seconds.
+        notes_per_second: The average number of chord notes per second, including every chord member.
+        chord_width: The number of notes in each chord.
+        lane_count: The number of lanes.
+        hold_ratio: The fraction of chord notes that start a hold chain.
+        hold_chain_length: The number of notes in each hold chain, including its start and end.
+        hold_chain_spacing: The time in seconds between consecutive notes of a hold chain.
+        anchor_ratio: The fraction of hold chain middle notes that are anchors instead of ticks.
+        flick_ratio: The fraction of chord notes that are directional flicks.
+        timescale_group_count: The number of timescale groups notes are spread across.
+        timescale_change_count: The number of timescale changes in each group.
+        seed: The random seed.
+    """
+
+    duration: float = 60.0
+    notes_per_second: float = 20.0
+    chord_width: int = 2
+    lane_count: int = 7
+    hold_ratio: float = 0.0
+    hold_chain_length: int = 2
+    hold_chain_spacing: float = 0.125
+    anchor_ratio: float = 0.0
+    flick_ratio: float = 0.0
+    timescale_group_count: int = 1
+    timescale_change_count: int = 0
+    seed: int = 0
+
+
+stress_scenarios = {
+    "convexity-stress-chords": StressParams(notes_per_second=40, chord_width=7),
+    "convexity-stress-holds": StressParams(
+        notes_per_second=12,
+        chord_width=3,
+        hold_ratio=1.0,
+        hold_chain_length=8,
+        anchor_ratio=0.5,
+    ),
+    "convexity-stress-flicks": StressParams(notes_per_second=24, chord_width=2, flick_ratio=1.0),
+    "convexity-stress-soflan": StressParams(
+        notes_per_second=16,
+        chord_width=4,
+        timescale_group_count=4,
+        timescale_change_count=2000,
+    ),
+}
+
+
+def generate_stress_level_data(params: StressParams) -> LevelData:
+    rng = random.Random(params.seed)
+    lane_count = params.lane_count
+    chord_width = min(params.chord_width, lane_count)
+
+    def lane_at(i: int) -> float:
+        return i - (lane_count - 1) / 2
+
+    stages = [
+        Stage(
+            lane=0,
+            width=lane_count,
+        )
+    ]
+    lanes = [Lane(lane=lane_at(i)) for i in range(lane_count)]
+
+    # Bpm is fixed at 60 so beats are equal to seconds.
+    timescale_entities = []
+    timescale_groups = []
+    for _ in range(params.timescale_group_count):
+        group = TimescaleGroup()
+        timescale_groups.append(group)
+        timescale_entities.append(group)
+        timescale_entities.append(TimescaleChange(beat=0, scale=1))
+        timescale_entities.extend(
+            TimescaleChange(
+                beat=(i + 1) * params.duration / (params.timescale_change_count + 1),
+                scale=rng.choice((0.25, 0.5, 1, 2, 4)),
+            )
+            for i in range(params.timescale_change_count)
+        )
+
+    notes = []
+    chord_interval = chord_width / params.notes_per_second
+    for chord_index in range(int(params.duration / chord_interval)):
+        beat = 1 + chord_index * chord_interval
+        for lane_index in rng.sample(range(lane_count), chord_width):
+            group = timescale_groups[(chord_index + lane_index) % len(timescale_groups)]
+            if rng.random() < params.hold_ratio and params.hold_chain_length >= 2:
+                notes.extend(generate_hold_chain(params, rng, group, beat, lane_index))
+            elif rng.random() < params.flick_ratio:
+                notes.append(
+                    Note(
+                        variant=NoteVariant.DIRECTIONAL_FLICK,
+                        beat=beat,
+                        lane=lane_at(lane_index),
+                        direction=rng.choice((-2, -1, 1, 2)),
+                        timescale_group_ref=group.ref(),
+                    )
+                )
+            else:
+                notes.append(
+                    Note(
+                        variant=NoteVariant.SINGLE,
+                        beat=beat,
+                        lane=lane_at(lane_index),
+                        timescale_group_ref=group.ref(),
+                    )
+                )
+
+    notes = order_notes(notes)
+    notes_by_beat: dict[float, list[Note]] = {}
+    for note in notes:
+        notes_by_beat.setdefault(note.beat, []).append(note)
+    for chord in notes_by_beat.values():
+        chord.sort(key=lambda note: note.lane)
+        for a, b in itertools.pairwise(n for n in chord if n.variant != NoteVariant.HOLD_ANCHOR):
+            a.sim_note_ref @= b.ref()
+
+    level_data = LevelData(
+        bgm_offset=0,
+        entities=[
+            Init(
+                base_leniency=1,
+            ),
+            *timescale_entities,
+            *stages,
+            *lanes,
+            BpmChange(beat=0, bpm=60, meter=4),
+            *notes,
+        ],
+    )
+    return bake_timescale_sections(level_data)
+
+
+def generate_hold_chain(
+    params: StressParams, rng: random.Random, group: TimescaleGroup, beat: float, lane_index: int
+) -> list[Note]:
+    lane_count = params.lane_count
+    prev_note = Note(
+        variant=NoteVariant.HOLD_START,
+        beat=beat,
+        lane=lane_index - (lane_count - 1) / 2,
+        timescale_group_ref=group.ref(),
+    )
+    chain = [prev_note]
+    for i in range(1, params.hold_chain_length):
+        lane_index = max(0, min(lane_count - 1, lane_index + rng.choice((-1, 0, 1))))
+        is_anchor = i < params.hold_chain_length - 1 and rng.random() < params.anchor_ratio
+        if i == params.hold_chain_length - 1:
+            variant = NoteVariant.HOLD_END
+        elif is_anchor:
+            variant = NoteVariant.HOLD_ANCHOR
+        else:
+            variant = NoteVariant.HOLD_TICK
+        note = (UnscoredNote if is_anchor else Note)(
+            variant=variant,
+            beat=beat + i * params.hold_chain_spacing,
+            lane=lane_index - (lane_count - 1) / 2,
+            timescale_group_ref=group.ref(),
+            prev_note_ref=prev_note.ref(),
+        )
+        chain.append(note)
+        prev_note = note
+    return chain
+
+
+def generate_stress_level(name: str, params: StressParams) -> Level:
+    return Level(
+        name=name,
+        title=name.removeprefix("convexity-").replace("-", " ").title(),
+        author="Convexity",
+        data=generate_stress_level_data(params),
+    )
+
+
+def load_stress_levels():
+    for name, params in stress_scenarios.items():
+        yield from cached_levels(
+            f"stress:{name}:{params!r}", lambda name=name, params=params: [generate_stress_level(name, params)]
+        )
+
+
+def main():
+    defaults = StressParams()
+    parser = argparse.ArgumentParser(description="Generate a stress level for engine performance testing.")
+    parser.add_argument("name", help="level name, e.g. convexity-stress-custom")
+    parser.add_argument("--output", type=Path, default=Path("downloads") / "levels", help="levels directory")
+    for field, default in defaults._asdict().items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+
+    params = StressParams(**{field: getattr(args, field) for field in StressParams._fields})
+    level = generate_stress_level(args.name, params)
+    level.export("convexity").write_to_dir(args.output / args.name)
+    print(f"Wrote {len(level.data.entities)} entities to {args.output / args.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 from sonolus.script.instruction import clear_instruction
 from sonolus.script.runtime import time
 
+from convexity.common.note import update_frame_constants
 from convexity.tutorial.phases import TutorialState, tutorial_phases
 from convexity.tutorial.stage import draw_tutorial_stage
 
 
 def update():
+    update_frame_constants()
     if TutorialState.phase_start_time == 0:
         TutorialState.phase_start_time = time()
     draw_tutorial_stage()
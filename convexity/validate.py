@@ -0,0 +1,139 @@
+from typing import NamedTuple
+
+from convexity.common.note import MAX_PREV_LOOKBACK
+from convexity.convert.timescale import make_beat_to_time
+
+NOTE_ARCHETYPES = frozenset({"Note", "UnscoredNote"})
+REF_TARGETS = {
+    "prev_note_ref": NOTE_ARCHETYPES,
+    "sim_note_ref": NOTE_ARCHETYPES,
+    "timescale_group_ref": frozenset({"TimescaleGroup"}),
+}
+
+
+class Violation(NamedTuple):
+    entity_index: int
+    message: str
+
+
+def validate_level_data(data: dict) -> list[Violation]:
+    """Find problems in exported level data that would break or stall the runtime.
+
+    Checked are references, prev note chain cycles and lengths, timescale change lists and whether every note time
+    is covered by a timescale section. Fields missing from an entity are read as zero, so compacted level data is
+    supported.
+
+    Args:
+        data: The level data json.
+
+    Returns:
+        The violations found, each with the index of the offending entity.
+    """
+    raw_entities = data["entities"]
+    archetypes = [e["archetype"] for e in raw_entities]
+    indexes_by_name = {e["name"]: i for i, e in enumerate(raw_entities) if "name" in e}
+    violations = []
+
+    values: list[dict[str, float]] = []
+    refs: list[dict[str, int]] = []
+    for i, e in enumerate(raw_entities):
+        entity_values = {}
+        entity_refs = {}
+        for entry in e["data"]:
+            if "value" in entry:
+                entity_values[entry["name"]] = entry["value"]
+            elif entry["ref"] in indexes_by_name:
+                entity_refs[entry["name"]] = indexes_by_name[entry["ref"]]
+            else:
+                violations.append(Violation(i, f"{entry['name']} references missing entity {entry['ref']!r}"))
+        values.append(entity_values)
+        refs.append(entity_refs)
+
+    note_indexes = [i for i, archetype in enumerate(archetypes) if archetype in NOTE_ARCHETYPES]
+    for i in note_indexes:
+        for field, targets in REF_TARGETS.items():
+            target = refs[i].get(field, 0)
+            if target != 0 and archetypes[target] not in targets:
+                violations.append(Violation(i, f"{field} references {archetypes[target]} entity {target}"))
+        if refs[i].get("timescale_group_ref", 0) == 0:
+            violations.append(Violation(i, "Note has no timescale group"))
+
+    def prev_index(i: int) -> int:
+        target = refs[i].get("prev_note_ref", 0)
+        return target if archetypes[target] in NOTE_ARCHETYPES else 0
+
+    # Depth of every note in its prev chain, or -1 while the chain through it is being walked.
+    depths: dict[int, int] = {}
+    for i in note_indexes:
+        chain = []
+        current = i
+        while current != 0 and current not in depths:
+            depths[current] = -1
+            chain.append(current)
+            current = prev_index(current)
+        if current != 0 and depths[current] == -1:
+            violations.append(Violation(current, "Prev note chain contains a cycle"))
+            for linked in chain:
+                depths[linked] = 0
+            continue
+        depth = depths.get(current, 0)
+        for linked in reversed(chain):
+            depth += 1
+            depths[linked] = depth
+        prev = prev_index(i)
+        if prev != 0 and values[prev].get("beat", 0) > values[i].get("beat", 0):
+            violations.append(Violation(i, f"Prev note {prev} is after the note"))
+
+    # Reported once per chain, at the first note past the limit.
+    violations.extend(
+        Violation(i, f"Prev note chain is longer than the runtime looks back ({MAX_PREV_LOOKBACK} notes)")
+        for i in note_indexes
+        if depths[i] == MAX_PREV_LOOKBACK + 1
+    )
+
+    bpm_changes = []
+    for i, archetype in enumerate(archetypes):
+        if archetype != "#BPM_CHANGE":
+            continue
+        if values[i].get("#BPM", 0) <= 0:
+            violations.append(Violation(i, "Bpm change has no positive bpm"))
+            continue
+        bpm_changes.append((values[i].get("#BEAT", 0), values[i]["#BPM"]))
+    beat_to_time = make_beat_to_time(bpm_changes)
+
+    def start_time(beat: float) -> float:
+        return beat_to_time(beat) if beat > 0 else -10
+
+    group_start_times = {}
+    for i, archetype in enumerate(archetypes):
+        if archetype == "TimescaleChange" and (
+            i == 0 or archetypes[i - 1] not in {"TimescaleGroup", "TimescaleChange"}
+        ):
+            violations.append(Violation(i, "Timescale change doesn't follow a timescale group"))
+        if archetype != "TimescaleGroup":
+            continue
+        end = i + 1
+        while end < len(archetypes) and archetypes[end] == "TimescaleChange":
+            end += 1
+        if end == i + 1:
+            violations.append(Violation(i, "Timescale group has no timescale changes"))
+            continue
+        group_start_times[i] = start_time(values[i + 1].get("beat", 0))
+        violations.extend(
+            Violation(j, "Timescale change is before the previous change")
+            for j in range(i + 2, end)
+            if start_time(values[j].get("beat", 0)) < start_time(values[j - 1].get("beat", 0))
+        )
+        if values[i].get("has_sections", 0):
+            violations.extend(
+                Violation(j, "Baked timescale section doesn't end where the next one starts")
+                for j in range(i + 1, end - 1)
+                if values[j].get("end_time", 0) != values[j + 1].get("start_time", 0)
+            )
+
+    for i in note_indexes:
+        group = refs[i].get("timescale_group_ref", 0)
+        if group in group_start_times and beat_to_time(values[i].get("beat", 0)) < group_start_times[group]:
+            violations.append(Violation(i, f"Note is before the first timescale change of group {group}"))
+
+    return sorted(violations)
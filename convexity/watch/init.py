@@ -14,8 +14,9 @@ from sonolus.script.vec import Vec2
 from convexity.common.init import init_buckets, init_life, init_score
 from convexity.common.lane import schedule_lane_sfx
 from convexity.common.layout import init_layout, update_backspin
-from convexity.common.note import update_current_beat
+from convexity.common.note import update_current_beat, update_frame_constants
 from convexity.common.streams import Streams
+from convexity.watch.bpm import BpmChange
 from convexity.watch.note import Note
 
 
@@ -37,9 +38,11 @@ class Init(WatchArchetype):
         for time in Streams.empty_touch_lanes.iter_keys_from(-10):
             schedule_lane_sfx(time)
 
+    @callback(order=-1)
     def update_sequential(self):
-        update_current_beat()
+        update_current_beat(BpmChange)
         update_backspin()
+        update_frame_constants()
 
 
 def init_ui():
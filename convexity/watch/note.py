@@ -25,6 +25,7 @@ from convexity.common.layout import (
     note_y,
 )
 from convexity.common.note import (
+    MAX_PREV_LOOKBACK,
     HoldHandle,
     NoteVariant,
     draw_note_arrow,
@@ -87,6 +88,9 @@ class Note(WatchArchetype):
     next_note_ref: EntityRef[Note] = entity_data()
 
     started: bool = entity_memory()
+    # First unfinished note among the previous notes, found by update_effective_prev.
+    effective_prev_ref: EntityRef[Note] = entity_memory()
+    effective_prev_depth: int = entity_memory()
     needs_init: bool = entity_memory()
 
     judgment: Judgment = imported()
@@ -169,6 +173,8 @@ class Note(WatchArchetype):
 
     def initialize(self):
         self.needs_init = True
+        self.effective_prev_ref @= self.prev_note_ref
+        self.effective_prev_depth = 0
 
     def update_sequential(self):
         if self.needs_init:
@@ -206,19 +212,30 @@ class Note(WatchArchetype):
                 y=self.y,
             )
 
+    def update_effective_prev(self):
+        # Handle a tick finishing before previous anchors by looking further back. Notes stay finished until a skip,
+        # so the search resumes where it stopped and moves back at most MAX_PREV_LOOKBACK times over the life of
+        # the note. A depth of MAX_PREV_LOOKBACK means every note looked at is finished.
+        if is_skip():
+            self.effective_prev_ref @= self.prev_note_ref
+            self.effective_prev_depth = 0
+        while self.effective_prev_depth < MAX_PREV_LOOKBACK and time() >= self.effective_prev.despawn_time():
+            if self.effective_prev.has_prev:
+                self.effective_prev_ref @= self.effective_prev.prev_note_ref
+                self.effective_prev_depth += 1
+            else:
+                self.effective_prev_depth = MAX_PREV_LOOKBACK
+
+    @property
+    def effective_prev(self) -> Note:
+        return self.effective_prev_ref.get()
+
     def draw_connector(self):
         if not self.has_prev:
             return
-        prev_finished = True
-        ref = copy(self.prev_note_ref)
-        for _ in range(20):
-            # Handle a tick finishing before previous anchors by looking further back.
-            prev_finished = prev_finished and time() >= ref.get().despawn_time()
-            if not prev_finished:
-                break
-            if not ref.get().has_prev:
-                break
-            ref @= ref.get().prev_note_ref
+        self.update_effective_prev()
+        prev_finished = self.effective_prev_depth >= MAX_PREV_LOOKBACK
+        ref = copy(self.effective_prev_ref)
         if prev_finished:
             ref @= self.prev_note_ref
         prev = ref.get()
@@ -306,16 +323,9 @@ class Note(WatchArchetype):
             return
         if not self.has_prev:
             return
-        prev_finished = True
-        ref = copy(self.prev_note_ref)
-        for _ in range(20):
-            # Handle a tick finishing before previous anchors by looking further back.
-            prev_finished = prev_finished and time() >= ref.get().despawn_time()
-            if not prev_finished:
-                break
-            if not ref.get().has_prev:
-                break
-            ref @= ref.get().prev_note_ref
+        self.update_effective_prev()
+        prev_finished = self.effective_prev_depth >= MAX_PREV_LOOKBACK
+        ref = copy(self.effective_prev_ref)
         if prev_finished:
             ref @= self.prev_note_ref
         prev = ref.get()
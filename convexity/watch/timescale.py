@@ -3,6 +3,7 @@ from __future__ import annotations
 from sonolus.script.archetype import (
     WatchArchetype,
     callback,
+    entity_data,
     entity_memory,
     imported,
     shared_memory,
@@ -17,6 +18,12 @@ from convexity.common.options import Options, SoflanMode
 
 
 class TimescaleGroup(WatchArchetype):
+    # Whether the converter already filled in the section tables of the timescale changes.
+    has_sections: bool = imported()
+
+    # Index one past the last timescale change of the group.
+    end_index: int = entity_data()
+
     scaled_time: float = shared_memory()
 
     last_note_time: float = shared_memory()
@@ -30,23 +37,51 @@ class TimescaleGroup(WatchArchetype):
         self.scaled_time = 0
         self.offset = 1
         self.last_note_time = 1e8
-
+        self.last_time_to_scaled_time_i = self.index + 1
+        self.last_scaled_time_to_time_i = self.index + 1
+
+        if not self.has_sections:
+            self.bake_sections()
+
+        self.end_index = self.index + 1
+        while TimescaleChange.is_at(self.end_index):
+            self.end_index += 1
+
+        # Scaled time is monotone over each run of sections whose scales share a sign, so lookups by scaled time
+        # can binary search within a run.
+        run_end_index = self.end_index - 1
+        run_direction = 0
+        i = self.end_index - 1
+        while i > self.index:
+            change = TimescaleChange.at(i)
+            direction = change.scale * (change.end_time - change.start_time)
+            if direction != 0:
+                if run_direction * direction < 0:
+                    run_end_index = i
+                run_direction = direction
+            change.run_end_index = run_end_index
+            i -= 1
+
+    def bake_sections(self):
         i = self.index + 1
-        scaled_time = 0
+        forward_scaled_time = 0
+        reverse_scaled_time = 0
         while True:
             if not TimescaleChange.is_at(i):
                 break
             change = TimescaleChange.at(i)
-            change.start_scaled_time = scaled_time
+            change.start_time = beat_to_time(change.beat) if change.beat > 0 else -10
             if TimescaleChange.is_at(i + 1):
-                change.end_time = TimescaleChange.at(i + 1).start_time
+                next_change = TimescaleChange.at(i + 1)
+                change.end_time = beat_to_time(next_change.beat) if next_change.beat > 0 else -10
             else:
                 change.end_time = 1e8
-            if Options.soflan_mode == SoflanMode.REVERSE:
-                change.end_scaled_time = scaled_time - change.scale * (change.end_time - change.start_time)
-            else:
-                change.end_scaled_time = scaled_time + change.scale * (change.end_time - change.start_time)
-            scaled_time = change.end_scaled_time
+            change.forward_start_scaled_time = forward_scaled_time
+            change.reverse_start_scaled_time = reverse_scaled_time
+            forward_scaled_time += change.scale * (change.end_time - change.start_time)
+            reverse_scaled_time -= change.scale * (change.end_time - change.start_time)
+            change.forward_end_scaled_time = forward_scaled_time
+            change.reverse_end_scaled_time = reverse_scaled_time
             i += 1
 
     def spawn_time(self) -> float:
@@ -83,49 +118,86 @@ class TimescaleGroup(WatchArchetype):
             case SoflanMode.DISABLED:
                 return real_time
             case _:
-                i = self.last_time_to_scaled_time_i
-                while True:
-                    section = TimescaleChange.at(i)
-                    if section.start_time <= real_time < section.end_time:
-                        self.last_time_to_scaled_time_i = i
-                        return remap(
-                            section.start_time,
-                            section.end_time,
-                            section.start_scaled_time,
-                            section.end_scaled_time,
-                            real_time,
-                        )
-                    i += 1
-                    if not TimescaleChange.is_at(i):
-                        error()
+                i = self.find_section_by_time(real_time)
+                self.last_time_to_scaled_time_i = i
+                section = TimescaleChange.at(i)
+                return remap(
+                    section.start_time,
+                    section.end_time,
+                    section.start_scaled_time,
+                    section.end_scaled_time,
+                    real_time,
+                )
 
     def _scaled_time_to_time(self, scaled_time: float) -> float:
         match Options.soflan_mode:
             case SoflanMode.DISABLED:
                 return scaled_time
             case _:
-                i = self.last_scaled_time_to_time_i
-                while True:
-                    section = TimescaleChange.at(i)
-                    if (section.start_scaled_time <= scaled_time < section.end_scaled_time) or (
-                        section.start_scaled_time >= scaled_time > section.end_scaled_time
-                    ):
-                        self.last_scaled_time_to_time_i = i
-                        return remap(
-                            section.start_scaled_time,
-                            section.end_scaled_time,
-                            section.start_time,
-                            section.end_time,
-                            scaled_time,
-                        )
-                    i += 1
-                    if not TimescaleChange.is_at(i):
-                        error()
+                i = self.find_section_by_scaled_time(scaled_time)
+                self.last_scaled_time_to_time_i = i
+                section = TimescaleChange.at(i)
+                return remap(
+                    section.start_scaled_time,
+                    section.end_scaled_time,
+                    section.start_time,
+                    section.end_time,
+                    scaled_time,
+                )
+
+    def find_section_by_time(self, real_time: float) -> int:
+        lo = self.index + 1
+        i = self.last_time_to_scaled_time_i
+        if TimescaleChange.at(i).start_time <= real_time:
+            # Notes mostly come in order, so the section is usually the last one visited or the one after it.
+            if real_time < TimescaleChange.at(i).end_time:
+                return i
+            if real_time < TimescaleChange.at(i + 1).end_time:
+                return i + 1
+            lo = i + 2
+        if real_time < TimescaleChange.at(lo).start_time:
+            error()
+        hi = self.end_index - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if TimescaleChange.at(mid).start_time <= real_time:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def find_section_by_scaled_time(self, scaled_time: float) -> int:
+        # Finds the first section from the last one visited that contains the scaled time, like a linear scan would,
+        # but skips over whole runs of sections and binary searches the run containing it.
+        i = self.last_scaled_time_to_time_i
+        while i < self.end_index:
+            run_end_index = TimescaleChange.at(i).run_end_index
+            direction = 1
+            if TimescaleChange.at(run_end_index).end_scaled_time < TimescaleChange.at(i).start_scaled_time:
+                direction = -1
+            target = direction * scaled_time
+            if (
+                direction * TimescaleChange.at(i).start_scaled_time
+                <= target
+                < direction * TimescaleChange.at(run_end_index).end_scaled_time
+            ):
+                lo = i
+                hi = run_end_index
+                while lo < hi:
+                    mid = (lo + hi + 1) // 2
+                    if direction * TimescaleChange.at(mid).start_scaled_time <= target:
+                        lo = mid
+                    else:
+                        hi = mid - 1
+                return lo
+            i = run_end_index + 1
+        error()
+        return i
 
     def get_note_times(self, target_time: float) -> tuple[float, float]:
         if target_time < self.last_note_time:
-            # As long as the notes are increasing in time, we can start from the indexes we last visited
-            self.last_time_to_scaled_time_i = self.index + 1
+            # Scaled time lookups return the first matching section from the last one visited, so they restart from
+            # the beginning when notes go back in time. Time lookups don't depend on the order.
             self.last_scaled_time_to_time_i = self.index + 1
         self.last_note_time = target_time
         scaled_time = self._time_to_scaled_time(target_time)
@@ -138,10 +210,24 @@ class TimescaleChange(WatchArchetype):
     beat: float = imported()
     scale: float = imported()
 
-    start_scaled_time: float = shared_memory()
-    end_scaled_time: float = shared_memory()
-    end_time: float = shared_memory()
+    start_time: float = imported()
+    end_time: float = imported()
+    forward_start_scaled_time: float = imported()
+    forward_end_scaled_time: float = imported()
+    reverse_start_scaled_time: float = imported()
+    reverse_end_scaled_time: float = imported()
+
+    # Index of the last section of the run of sections with the same scale direction as this one.
+    run_end_index: int = entity_data()
+
+    @property
+    def start_scaled_time(self) -> float:
+        if Options.soflan_mode == SoflanMode.REVERSE:
+            return self.reverse_start_scaled_time
+        return self.forward_start_scaled_time
 
     @property
-    def start_time(self) -> float:
-        return beat_to_time(self.beat) if self.beat > 0 else -10
+    def end_scaled_time(self) -> float:
+        if Options.soflan_mode == SoflanMode.REVERSE:
+            return self.reverse_end_scaled_time
+        return self.forward_end_scaled_time
@@ -1,7 +1,16 @@
+import json
+import logging
 import multiprocessing as mp
 from collections.abc import Callable
 from pathlib import Path
 
+from sonolus.script.level import LevelData
+
+from convexity.catalog import has_level, open_catalog, upsert_level, upsert_playlist
+from convexity.convert.cache import CONVERTER_VERSION
+from convexity.convert.dedup import chart_fingerprint, claim, config_fingerprint, link_level_data
+from convexity.convert.order import report_entity_order
+from convexity.convert.serialize import export_compact_level
 from convexity.convert.sonolus_bandori import convert_sonolus_bandori_level_data
 from convexity.convert.sonolus_llsif import convert_sonolus_llsif_level_data
 from convexity.convert.sonolus_nanaon import convert_sonolus_nanaon_level_data
@@ -15,20 +24,72 @@ from convexity.project import engine
 
 BASE_DIR = Path("downloads")
 PROCESS_COUNT = mp.cpu_count()
+# Write level data without default values and with beats snapped to a 1/960 grid.
+COMPACT_LEVEL_DATA = True
+DEDUP_DIR = BASE_DIR / "cache" / "dedup"
+# Levels whose data is a hard link to the data of an identical chart, by name.
+ALIASES_PATH = BASE_DIR / "aliases.json"
+# Metadata, tags, asset hashes and sync versions of exported levels and playlists.
+CATALOG_PATH = BASE_DIR / "catalog.sqlite"
+
+
+def configure_logging():
+    # Converters log what they changed about a chart, which is shown along with the export progress.
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
 
-def convert_level(item: dict, base_url: str, tag: str, converter: Callable, process_num: int):
+def convert_level(item: dict, base_url: str, tag: str, converter: Callable, process_num: int) -> tuple[str, str] | None:
     name = f"convexity-{item['name']}"
     level_dir = BASE_DIR / "levels" / name
 
     if (level_dir / "data").exists():
+        db = open_catalog(CATALOG_PATH)
+        if not has_level(db, name):
+            upsert_level(db, level_dir, tag)
+        db.close()
         print(f"[Process {process_num}] Skipped: {name}")
-        return
+        return None
 
     level_dir.mkdir(parents=True, exist_ok=True)
+    source_hash = item["data"].get("hash")
+    # The same source data only converts to the same level data with the same converter and options.
+    source_key = f"source-{converter.__name__}-{tag}-{int(COMPACT_LEVEL_DATA)}-{CONVERTER_VERSION}-{source_hash}"
+    source_owner = claim(DEDUP_DIR, source_key, name) if source_hash else name
+    if source_owner != name and (BASE_DIR / "levels" / source_owner / "data").exists():
+        # Another source published the same data, so it is neither fetched nor converted again. The placeholder data
+        # is replaced by a link to the data of the level that converted it.
+        placeholder = LevelData(bgm_offset=0, entities=[])
+        convert_sonolus_level_item(item, base_url, tag, converter, data=placeholder).export("convexity").write_to_dir(
+            level_dir
+        )
+        if link_level_data(level_dir, BASE_DIR / "levels" / source_owner):
+            return finish_level(level_dir, tag, process_num, owner=source_owner)
+
     converted = convert_sonolus_level_item(item, base_url, tag, converter)
-    converted.export("convexity").write_to_dir(level_dir)
-    print(f"[Process {process_num}] Downloaded: {name}")
+    report_entity_order(name, converted.data)
+    if COMPACT_LEVEL_DATA:
+        export_compact_level(converted, "convexity").write_to_dir(level_dir)
+    else:
+        converted.export("convexity").write_to_dir(level_dir)
+
+    # Sonolus levels have a single data file, so levels only share it if their configuration matches as well.
+    chart_key = (
+        f"chart-{int(COMPACT_LEVEL_DATA)}-{chart_fingerprint(converted.data)}-{config_fingerprint(converted.data)}"
+    )
+    owner = claim(DEDUP_DIR, chart_key, name)
+    linked = owner != name and link_level_data(level_dir, BASE_DIR / "levels" / owner)
+    return finish_level(level_dir, tag, process_num, owner=owner if linked else None)
+
+
+def finish_level(level_dir: Path, tag: str, process_num: int, owner: str | None) -> tuple[str, str] | None:
+    db = open_catalog(CATALOG_PATH)
+    upsert_level(db, level_dir, tag)
+    db.close()
+    if owner is not None:
+        print(f"[Process {process_num}] Downloaded: {level_dir.name} (data shared with {owner})")
+        return level_dir.name, owner
+    print(f"[Process {process_num}] Downloaded: {level_dir.name}")
+    return None
 
 
 def download_levels(base_url: str, converter: Callable, tag: str):
@@ -37,20 +98,33 @@ def download_levels(base_url: str, converter: Callable, tag: str):
 
     print(f"Starting conversion using {PROCESS_COUNT} processes...")
 
-    with mp.Pool(PROCESS_COUNT) as pool:
-        pool.starmap(
+    with mp.Pool(PROCESS_COUNT, initializer=configure_logging) as pool:
+        aliases = pool.starmap(
             convert_level,
             [(item, base_url, tag, converter, i) for i, item in enumerate(items)],
         )
+    write_aliases([alias for alias in aliases if alias is not None])
 
     print("Done!")
     return items
 
 
+def write_aliases(aliases: list[tuple[str, str]]):
+    index = json.loads(ALIASES_PATH.read_text(encoding="utf-8")) if ALIASES_PATH.exists() else {}
+    index.update(aliases)
+    ALIASES_PATH.write_text(json.dumps(index, ensure_ascii=False, indent=2), encoding="utf-8")
+    if aliases:
+        print(f"Shared level data: {len(aliases)} duplicate charts")
+
+
 def download_playlists(base_url: str, tag: str):
     print(f"Downloading playlist list from {base_url}...")
     playlists = get_playlist_items(base_url)
     write_playlist_items(BASE_DIR / "playlists", tag, playlists)
+    db = open_catalog(CATALOG_PATH)
+    for playlist in playlists:
+        upsert_playlist(db, BASE_DIR / "playlists" / f"convexity-{playlist['name']}", tag)
+    db.close()
     print("Done!")
 
 
@@ -59,6 +133,7 @@ def export_engine():
 
 
 def main():
+    configure_logging()
     download_playlists(base_url="https://sonolus.milkbun.org/llsif/", tag="LLSIF")
     download_playlists(base_url="https://sonolus.bestdori.com/official/", tag="Bandori")
     download_playlists(base_url="https://sonolus.milkbun.org/nanaon/", tag="Nanaon")
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import multiprocessing as mp
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import NamedTuple
+
+from convexity.convert.cache import CONVERTER_VERSION, SCHEMA_VERSION
+from convexity.convert.order import report_entity_order
+from convexity.convert.osu import convert_osz
+from convexity.convert.serialize import export_compact_level
+from export import BASE_DIR, COMPACT_LEVEL_DATA, PROCESS_COUNT, configure_logging
+
+CACHE_DIR = BASE_DIR / "cache" / "osz"
+
+
+class ImportResult(NamedTuple):
+    path: Path
+    level_names: list[str]
+    cached: bool
+    error: str | None
+
+
+def pack_hash(osz: bytes) -> str:
+    return hashlib.sha256(osz).hexdigest()
+
+
+def import_osz_file(path: Path) -> ImportResult:
+    # Any failure is contained to the pack being imported so one broken file doesn't abort the whole library.
+    try:
+        return convert_osz_file(path)
+    except Exception:
+        return ImportResult(path, [], cached=False, error=traceback.format_exc())
+
+
+def convert_osz_file(path: Path) -> ImportResult:
+    osz = path.read_bytes()
+    # Levels converted by an older converter are converted again.
+    cache_path = CACHE_DIR / f"{pack_hash(osz)}-{CONVERTER_VERSION}-{SCHEMA_VERSION}.json"
+    if cache_path.exists():
+        level_names = json.loads(cache_path.read_text(encoding="utf-8"))
+        if all((BASE_DIR / "levels" / name / "data").exists() for name in level_names):
+            return ImportResult(path, level_names, cached=True, error=None)
+
+    level_names = []
+    for level in convert_osz(osz):
+        report_entity_order(level.name, level.data)
+        exported = export_compact_level(level, "convexity") if COMPACT_LEVEL_DATA else level.export("convexity")
+        exported.write_to_dir(BASE_DIR / "levels" / level.name)
+        level_names.append(level.name)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps(level_names), encoding="utf-8")
+    return ImportResult(path, level_names, cached=False, error=None)
+
+
+def import_osz_levels(source_dir: Path, process_count: int = PROCESS_COUNT) -> list[ImportResult]:
+    paths = sorted(Path(source_dir).rglob("*.osz"))
+    print(f"Importing {len(paths)} packs from {source_dir} using {process_count} processes...")
+
+    start = time.perf_counter()
+    results = []
+    with mp.Pool(process_count, initializer=configure_logging) as pool:
+        for result in pool.imap_unordered(import_osz_file, paths, chunksize=4):
+            results.append(result)
+            if result.error is not None:
+                print(f"Failed: {result.path.name}")
+            elif result.cached:
+                print(f"Skipped: {result.path.name} ({len(result.level_names)} levels)")
+            else:
+                print(f"Imported: {result.path.name} ({len(result.level_names)} levels)")
+    elapsed = time.perf_counter() - start
+
+    print_summary(results, elapsed)
+    return results
+
+
+def print_summary(results: list[ImportResult], elapsed: float):
+    failures = [result for result in results if result.error is not None]
+    imported = [result for result in results if result.error is None and not result.cached]
+    cached = [result for result in results if result.cached]
+    level_count = sum(len(result.level_names) for result in imported)
+
+    print(f"Packs: {len(results)} ({len(imported)} imported, {len(cached)} cached, {len(failures)} failed)")
+    print(f"Levels converted: {level_count}")
+    if elapsed > 0:
+        print(f"Throughput: {len(results) / elapsed:.2f} packs/s, {level_count / elapsed:.2f} levels/s")
+    for failure in failures:
+        print(f"--- {failure.path}")
+        print(failure.error)
+
+
+def main():
+    configure_logging()
+    if len(sys.argv) != 2:
+        print("Usage: python import_osz.py <directory>")
+        sys.exit(1)
+    results = import_osz_levels(Path(sys.argv[1]))
+    if any(result.error is not None for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
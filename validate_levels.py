@@ -0,0 +1,39 @@
+import gzip
+import json
+import multiprocessing as mp
+import sys
+from pathlib import Path
+
+from convexity.validate import Violation, validate_level_data
+from export import BASE_DIR, PROCESS_COUNT
+
+
+def validate_level(level_dir: Path) -> tuple[str, list[Violation]]:
+    data = json.loads(gzip.decompress((level_dir / "data").read_bytes()))
+    return level_dir.name, validate_level_data(data)
+
+
+def validate_levels(levels_dir: Path, process_count: int = PROCESS_COUNT) -> dict[str, list[Violation]]:
+    level_dirs = sorted(path.parent for path in Path(levels_dir).glob("*/data"))
+    print(f"Validating {len(level_dirs)} levels using {process_count} processes...")
+
+    with mp.Pool(process_count) as pool:
+        results = dict(pool.imap_unordered(validate_level, level_dirs, chunksize=16))
+
+    invalid = {name: violations for name, violations in sorted(results.items()) if violations}
+    for name, violations in invalid.items():
+        print(f"--- {name}")
+        for violation in violations:
+            print(f"Entity {violation.entity_index}: {violation.message}")
+    print(f"Levels: {len(results)} ({len(invalid)} invalid)")
+    return invalid
+
+
+def main():
+    levels_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else BASE_DIR / "levels"
+    if validate_levels(levels_dir):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()